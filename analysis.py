@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Image analysis for Braille art
+One histogram pass per image yields everything the renderer needs to know
+about it: mean, standard deviation, percentiles, the auto and Otsu thresholds
+and the contrast-enhancement lookup tables. Enhancement and thresholding then
+collapse into a single Image.point() lookup.
+"""
+
+import math
+
+from PIL import Image
+
+# ImageEnhance.Contrast factor used for images that have enough contrast to
+# start with (see ImageAnalysis.enhance_lut)
+CONTRAST_FACTOR = 1.3
+
+
+def analyze(img):
+    """ImageAnalysis of a PIL image's grayscale histogram (one pass over the pixels)."""
+    if img.mode != "L":
+        img = img.convert("L")
+    return ImageAnalysis(img.histogram())
+
+
+def threshold_lut(threshold, invert=False, lut=None):
+    """Point table that maps pixel values to a Braille dot mask.
+
+    Values become 0 where image_to_braille() would set a dot at ``threshold``
+    (and ``invert``) and 255 elsewhere. With ``lut`` (e.g. an enhancement
+    table) the values are looked up in it first, so both steps take one
+    Image.point() call.
+    """
+    values = lut or range(256)
+    if invert:
+        return [0 if v > threshold else 255 for v in values]
+    return [0 if v < threshold else 255 for v in values]
+
+
+class ImageAnalysis:
+    """Statistics of a grayscale image, all derived from its 256-bin histogram.
+
+    ``mean`` and ``stddev`` match PIL.ImageStat.Stat, ``equalize_lut()`` and
+    ``contrast_lut()`` match ImageOps.equalize and ImageEnhance.Contrast, so
+    ``img.point(lut)`` gives the same image as those would.
+    """
+
+    def __init__(self, histogram):
+        self.histogram = list(histogram)
+        self.count = sum(self.histogram)
+        total = sum(value * n for value, n in enumerate(self.histogram))
+        squares = sum(value * value * n for value, n in enumerate(self.histogram))
+        self.mean = total / self.count if self.count else 0.0
+        self.stddev = math.sqrt((squares - total * total / self.count) / self.count) if self.count else 0.0
+        self._otsu = None
+
+    def remap(self, lut):
+        """Analysis of the image after ``img.point(lut)``, without touching its pixels."""
+        histogram = [0] * 256
+        for value, n in enumerate(self.histogram):
+            histogram[lut[value]] += n
+        return ImageAnalysis(histogram)
+
+    def percentile(self, q):
+        """Smallest pixel value that at least ``q`` percent of the pixels do not exceed."""
+        target = self.count * q / 100
+        seen = 0
+        for value, n in enumerate(self.histogram):
+            seen += n
+            if n and seen >= target:
+                return value
+        return 255
+
+    @property
+    def auto_threshold(self):
+        """The threshold image_to_braille() uses for the default 127: 85% of the mean."""
+        return int(self.mean * 0.85)
+
+    @property
+    def otsu(self):
+        """Otsu's threshold t: "pixel < t" splits the histogram into the two
+        classes with the largest between-class variance."""
+        if self._otsu is None:
+            self._otsu = self._otsu_threshold()
+        return self._otsu
+
+    def _otsu_threshold(self):
+        total = self.count
+        total_sum = sum(value * n for value, n in enumerate(self.histogram))
+        best_variance, best_value = -1.0, 0
+        dark = dark_sum = 0
+        for value, n in enumerate(self.histogram):
+            dark += n
+            dark_sum += value * n
+            light = total - dark
+            if not dark:
+                continue
+            if not light:
+                break
+            # Between-class variance, scaled by total**2
+            spread = total_sum * dark - total * dark_sum
+            variance = spread * spread / (dark * light)
+            if variance > best_variance:
+                best_variance, best_value = variance, value
+        return best_value + 1
+
+    @property
+    def low_contrast(self):
+        """True when the image is flat or nearly all light or dark, so that
+        equalization works better than a contrast boost."""
+        return self.stddev < 20 or self.mean > 240 or self.mean < 15
+
+    def equalize_lut(self):
+        """Point table of ImageOps.equalize for this histogram."""
+        used = [n for n in self.histogram if n]
+        step = (sum(used) - used[-1]) // 255 if len(used) > 1 else 0
+        if not step:
+            return list(range(256))
+        lut = []
+        n = step // 2
+        for count in self.histogram:
+            lut.append(min(255, n // step))
+            n += count
+        return lut
+
+    def contrast_lut(self, factor=CONTRAST_FACTOR):
+        """Point table of ImageEnhance.Contrast(img).enhance(factor).
+
+        The table is produced by Image.blend() itself on a 256-pixel ramp, so
+        its rounding matches Pillow's exactly.
+        """
+        ramp = Image.frombytes("L", (256, 1), bytes(range(256)))
+        gray = Image.new("L", (256, 1), int(self.mean + 0.5))
+        return list(Image.blend(gray, ramp, factor).tobytes())
+
+    def enhance_lut(self):
+        """Point table of textart.enhance_contrast(): equalization for
+        low-contrast images, a moderate contrast boost otherwise."""
+        return self.equalize_lut() if self.low_contrast else self.contrast_lut()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Animated Braille Art
+Convert animated GIF/WebP/PNG frames to Braille art and play them in the terminal
+"""
+
+from PIL import Image, ImageSequence
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import sys
+import os
+import argparse
+import json
+import shutil
+import time
+
+from textart import (ENGINES, DECODE_GAP, DITHER_MODES, auto_threshold, braille_codes, braille_from_codes,
+                     braille_row, resolve_engine, target_size)
+
+# Browsers play GIF frames with a delay of 10ms or less at 100ms; so do we
+DEFAULT_DURATION = 100
+
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+
+
+class BrailleAnimation:
+    """Rendered frames of an animation.
+
+    ``frames`` holds each frame as row-major cell codes (see textart.braille_codes)
+    and ``durations`` how long to show it in milliseconds. ``loop`` is the
+    source's loop count (0 = forever, None = play once) and ``seconds`` the
+    time rendering took.
+    """
+
+    def __init__(self, cols, rows, frames, durations, loop=None, seconds=0.0):
+        self.cols = cols
+        self.rows = rows
+        self.frames = frames
+        self.durations = durations
+        self.loop = loop
+        self.seconds = seconds
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def fps(self):
+        """Rendering throughput in frames per second"""
+        return len(self.frames) / self.seconds if self.seconds else float("inf")
+
+    def art(self, index):
+        """Braille art string of one frame"""
+        return braille_from_codes(self.frames[index], self.cols, self.rows)
+
+    def to_json(self):
+        """JSON-serializable dict with every frame's art and duration"""
+        return {
+            "cols": self.cols,
+            "rows": self.rows,
+            "loop": self.loop,
+            "frames": [{"art": self.art(i), "duration": duration} for i, duration in enumerate(self.durations)],
+        }
+
+
+def flatten_frame(frame):
+    """Grayscale copy of a frame, with transparent areas composited onto white."""
+    if frame.mode in ("RGBA", "LA", "PA") or "transparency" in frame.info:
+        rgba = frame.convert("RGBA")
+        background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+        return Image.alpha_composite(background, rgba).convert("L")
+    return frame.convert("L")
+
+
+def frame_duration(frame):
+    """Display time of the current frame in milliseconds"""
+    duration = frame.info.get("duration") or 0
+    return duration if duration > 10 else DEFAULT_DURATION
+
+
+def iter_frames(img):
+    """Yield (grayscale frame, duration in ms) for every frame of ``img``.
+
+    Frames are decoded in order (each GIF frame builds on the previous one)
+    and flattened to standalone "L" images, so they can be rendered anywhere.
+    """
+    for frame in ImageSequence.Iterator(img):
+        yield flatten_frame(frame), frame_duration(frame)
+
+
+def render_frame(frame, size, threshold, invert, engine, dither="none"):
+    """Resize one grayscale frame to the animation's plan and return its cell codes"""
+    if frame.size != size:
+        frame = frame.resize(size, Image.LANCZOS, reducing_gap=DECODE_GAP)
+    return braille_codes(frame, threshold, invert=invert, engine=engine, dither=dither)[0]
+
+
+def _map_bounded(pool, fn, jobs, window):
+    """pool.map() that keeps at most ``window`` jobs in flight, preserving order"""
+    pending = deque()
+    for job in jobs:
+        pending.append(pool.submit(fn, *job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def render_animation(img_or_path, cols=None, rows=None, max_cols=None,
+                     threshold=127, invert=False, engine="auto", workers=1, dither="none"):
+    """Render every frame of an animated image to Braille cell codes.
+
+    The resize plan (the target size from textart.target_size) and the
+    threshold are computed once, from the first frame, and reused for every
+    frame, so frames line up and the brightness cut-off does not flicker.
+    With the default threshold the auto-threshold of the first resized frame
+    is used. Ordered ``dither`` modes (bayer*) stay stable from frame to
+    frame; error diffusion may shimmer where frames change. With ``workers`` > 1
+    frames are resized and thresholded in parallel worker processes while the
+    main process keeps decoding.
+    """
+    engine = resolve_engine(engine)
+    img = img_or_path if isinstance(img_or_path, Image.Image) else Image.open(img_or_path)
+    start = time.perf_counter()
+
+    width, height = target_size(img.size, cols=cols, rows=rows, max_cols=max_cols)
+    size = (width - width % 2, height)
+    frames = iter_frames(img)
+    first, first_duration = next(frames)
+    if threshold == 127 and dither == "none":
+        small = first if first.size == size else first.resize(size, Image.LANCZOS, reducing_gap=DECODE_GAP)
+        threshold = auto_threshold(small)
+
+    durations = [first_duration]
+
+    def jobs():
+        yield first, size, threshold, invert, engine, dither
+        for frame, duration in frames:
+            durations.append(duration)
+            yield frame, size, threshold, invert, engine, dither
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            codes = list(_map_bounded(pool, render_frame, jobs(), 2 * workers))
+    else:
+        codes = [render_frame(*job) for job in jobs()]
+
+    return BrailleAnimation(size[0] // 2, size[1] // 4, codes, durations,
+                            loop=img.info.get("loop"), seconds=time.perf_counter() - start)
+
+
+def frame_updates(previous, codes, cols):
+    """ANSI text that turns frame ``previous`` on screen into frame ``codes``.
+
+    Only rows that changed are touched: for each, the cursor jumps to the first
+    changed cell and the span up to the last changed cell is rewritten.
+    """
+    parts = []
+    for row, start in enumerate(range(0, len(codes), cols)):
+        old, new = previous[start:start + cols], codes[start:start + cols]
+        if old == new:
+            continue
+        first = 0
+        while old[first] == new[first]:
+            first += 1
+        last = cols - 1
+        while old[last] == new[last]:
+            last -= 1
+        parts.append(f"\x1b[{row + 1};{first + 1}H{braille_row(new[first:last + 1])}")
+    return "".join(parts)
+
+
+class TerminalPlayer:
+    """Draws successive Braille frames in place in an ANSI terminal.
+
+    The first frame is drawn in full; after that only changed cells are
+    rewritten (see frame_updates), unless ``diff`` is False. Use it as a
+    context manager so the cursor is restored afterwards.
+    """
+
+    def __init__(self, cols, rows, out=None, diff=True):
+        self.cols = cols
+        self.rows = rows
+        self.out = out or sys.stdout
+        self.diff = diff
+        self._shown = None
+
+    def __enter__(self):
+        self.out.write(HIDE_CURSOR + CLEAR_SCREEN)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.out.write(f"\x1b[{self.rows + 1};1H{SHOW_CURSOR}")
+        self.out.flush()
+
+    def show(self, codes):
+        """Draw one frame of row-major cell codes"""
+        if self._shown is None or not self.diff:
+            text = "\x1b[H" + braille_from_codes(codes, self.cols, self.rows)
+        else:
+            text = frame_updates(self._shown, codes, self.cols)
+        self.out.write(text)
+        self.out.flush()
+        self._shown = codes
+
+
+def play(animation, loops=1, out=None, diff=True):
+    """Play a BrailleAnimation in the terminal at its frame durations.
+
+    ``loops`` is the number of times to play it (0 = until interrupted). Frames
+    are scheduled against a monotonic clock, so slow redraws do not add up.
+    """
+    with TerminalPlayer(animation.cols, animation.rows, out=out, diff=diff) as player:
+        deadline = time.monotonic()
+        played = 0
+        while True:
+            for codes, duration in zip(animation.frames, animation.durations):
+                player.show(codes)
+                deadline += duration / 1000
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            played += 1
+            if loops and played >= loops:
+                break
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Convert an animated image to Braille art and play it")
+    p.add_argument("image", help="Animated GIF, WebP or PNG (a still image gives one frame)")
+    p.add_argument("--cols", type=int, help="Target number of Braille columns (default: fit the terminal)")
+    p.add_argument("--rows", type=int, help="Target number of Braille rows")
+    p.add_argument("--max-cols", type=int, default=None, help="Maximum columns (shrink only if wider)")
+    p.add_argument("--threshold", type=int, default=127, help="Grayscale threshold 0-255 (127 = auto from the first frame)")
+    p.add_argument("--invert", action="store_true", help="Invert colors (light on dark)")
+    p.add_argument("--engine", choices=ENGINES, default="auto", help="Rendering engine (auto uses NumPy when installed)")
+    p.add_argument("--dither", choices=DITHER_MODES, default="none", help="Dither frames (bayer modes do not shimmer)")
+    p.add_argument("--workers", type=int, default=1, help="Render frames in N worker processes")
+    p.add_argument("--json", help="Write the frames and durations as JSON to this file (- for stdout) instead of playing")
+    p.add_argument("--loop", type=int, default=1, help="Times to play the animation (0 = until Ctrl+C)")
+    p.add_argument("--no-diff", action="store_true", help="Redraw whole frames instead of only changed cells")
+    p.add_argument("--stats", action="store_true", help="Print rendering throughput in frames/sec to stderr")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if not os.path.isfile(args.image):
+        print(f"Image not found: {args.image}")
+        sys.exit(1)
+
+    cols, rows = args.cols, args.rows
+    if cols is None and rows is None and args.max_cols is None:
+        terminal = shutil.get_terminal_size()
+        cols, rows = terminal.columns, terminal.lines - 1
+
+    try:
+        animation = render_animation(args.image, cols=cols, rows=rows, max_cols=args.max_cols,
+                                     threshold=args.threshold, invert=args.invert, engine=args.engine,
+                                     workers=args.workers, dither=args.dither)
+    except Exception as e:
+        print(f"Failed to render animation: {e}")
+        sys.exit(1)
+
+    if args.stats:
+        print(f"Rendered {len(animation)} frames at {animation.cols}x{animation.rows} cells in "
+              f"{animation.seconds:.2f}s ({animation.fps:.1f} frames/sec)", file=sys.stderr)
+
+    if args.json:
+        if args.json == "-":
+            json.dump(animation.to_json(), sys.stdout, ensure_ascii=False)
+            sys.stdout.write("\n")
+        else:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(animation.to_json(), f, ensure_ascii=False)
+        return
+
+    try:
+        play(animation, loops=args.loop, diff=not args.no_diff)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
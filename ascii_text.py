@@ -6,6 +6,8 @@ Convert text to large ASCII art using different fonts/styles
 
 import argparse
 import sys
+from functools import lru_cache
+from itertools import repeat
 
 # ASCII font patterns with complete alphabet
 FONTS = {
@@ -507,82 +509,110 @@ FONTS = {
     }
 }
 
+def compile_font(font_data):
+    """Compile a FONTS entry into a row-major glyph index
+    
+    Returns a dict with the font 'height', 'rows' (one {char: row_string} dict
+    per glyph row, every glyph padded to a uniform width and to the full font
+    height) and 'fallback' (the rows used for unknown characters).
+    """
+    height = max((len(rows) for rows in font_data.values()), default=0)
+    rows = [{} for _ in range(height)]
+    for char, glyph in font_data.items():
+        glyph_width = max((len(line) for line in glyph), default=0)
+        for row in range(height):
+            line = glyph[row] if row < len(glyph) else ''
+            rows[row][char] = line.ljust(glyph_width)
+    
+    # Unknown character - use space or default pattern
+    if ' ' in font_data:
+        fallback = [rows[row][' '] for row in range(height)]
+    else:
+        fallback = ['   '] * height  # fallback spaces
+    return {'height': height, 'rows': rows, 'fallback': fallback}
+
+# Every font compiled once at import
+COMPILED_FONTS = {name: compile_font(font_data) for name, font_data in FONTS.items()}
+
+@lru_cache(maxsize=32)
+def spaced_glyph_rows(font, spacing):
+    """Per-row glyph tables with the inter-character spacing already appended"""
+    if font not in COMPILED_FONTS:
+        COMPILED_FONTS[font] = compile_font(FONTS[font])
+    compiled = COMPILED_FONTS[font]
+    gap = ' ' * spacing
+    rows = []
+    for row, glyphs in enumerate(compiled['rows']):
+        # Spacing goes after every character except a space
+        spaced = {char: line if char == ' ' else line + gap for char, line in glyphs.items()}
+        rows.append((spaced, compiled['fallback'][row] + gap))
+    return rows
+
 def text_to_ascii_art(text, font='block', spacing=1):
     """Convert text to ASCII art using specified font"""
     text = text.upper()
-    font_data = FONTS.get(font, FONTS['block'])
+    if font not in FONTS:
+        font = 'block'
     
     if not text:
         return ""
     
-    # Get height of font
-    if not font_data:
+    if not FONTS[font]:
         return "Error: Font not found"
     
-    height = len(font_data[list(font_data.keys())[0]])
-    
-    # Build each line
+    # Build each line with one join per row
     lines = []
-    for row in range(height):
-        line = ""
-        for char in text:
-            if char in font_data:
-                line += font_data[char][row]
-            else:
-                # Unknown character - use space or default pattern
-                if ' ' in font_data:
-                    line += font_data[' '][row]
-                else:
-                    line += '   '  # fallback spaces
-            
-            # Add spacing between characters
-            if char != ' ':
-                line += ' ' * spacing
-        lines.append(line)
+    for glyphs, fallback in spaced_glyph_rows(font, spacing):
+        lines.append(''.join(map(glyphs.get, text, repeat(fallback))))
     
     return '\n'.join(lines)
 
-def create_border(text_lines, border_char='#', padding=1):
-    """Add border around ASCII art"""
-    lines = text_lines.split('\n')
-    if not lines:
-        return ""
+def iter_border(lines, border_char='#', padding=1, width=None):
+    """Add border around ASCII art, one line at a time
+    
+    ``lines`` is any iterable of lines. With ``width`` given the lines are
+    streamed through as they arrive; otherwise they are collected first to find
+    the widest one.
+    """
+    if width is None:
+        lines = list(lines)
+        width = max((len(line) for line in lines), default=0)
     
-    max_width = max(len(line) for line in lines)
+    edge = border_char * (width + 2 * padding + 2)
+    left = border_char + ' ' * padding
+    right = ' ' * padding + border_char
     
     # Top border
-    bordered = [border_char * (max_width + 2 * padding + 2)]
+    yield edge
     
     # Side borders with padding
     for line in lines:
-        padded_line = line.ljust(max_width)
-        bordered.append(border_char + ' ' * padding + padded_line + ' ' * padding + border_char)
+        yield left + line.ljust(width) + right
     
     # Bottom border
-    bordered.append(border_char * (max_width + 2 * padding + 2))
-    
-    return '\n'.join(bordered)
+    yield edge
+
+def create_border(text_lines, border_char='#', padding=1):
+    """Add border around ASCII art"""
+    return '\n'.join(iter_border(text_lines.split('\n'), border_char, padding))
+
+@lru_cache(maxsize=64)
+def gradient_ramp(chars, width):
+    """The gradient character for every column 0..width-1 (cycling through chars)"""
+    return (chars * (width // len(chars) + 1))[:width]
+
+def iter_gradient(lines, chars=' .:-=+*#%@'):
+    """Create gradient effect line by line: spaces stay, other characters take the ramp"""
+    for line in lines:
+        ramp = gradient_ramp(chars, len(line))
+        yield ''.join([' ' if char == ' ' else shade for char, shade in zip(line, ramp)])
 
 def create_gradient_text(text, chars=' .:-=+*#%@'):
     """Create gradient effect using different ASCII characters"""
     if not text:
         return ""
     
-    lines = text.split('\n')
-    result_lines = []
-    
-    for line in lines:
-        new_line = ""
-        for i, char in enumerate(line):
-            if char == ' ':
-                new_line += ' '
-            else:
-                # Map position to gradient character
-                gradient_index = min(i % len(chars), len(chars) - 1)
-                new_line += chars[gradient_index]
-        result_lines.append(new_line)
-    
-    return '\n'.join(result_lines)
+    return '\n'.join(iter_gradient(text.split('\n'), chars))
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Convert text to ASCII art")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark animation.render_animation throughput (frames/sec) at several column
+counts and worker counts, and the terminal output saved by redrawing only
+changed cells. Without arguments a 640x480 animated GIF is generated from a
+sample image in the repository.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PIL import Image
+from animation import frame_updates, render_animation
+from textart import braille_from_codes
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_sample(path, frames):
+    """Write a 640x480 GIF of the sample image sliding across a white background"""
+    sprite = Image.open(os.path.join(REPO_DIR, 'devil.jpeg')).convert('RGB').resize((320, 320))
+    images = []
+    for i in range(frames):
+        frame = Image.new('RGB', (640, 480), 'white')
+        frame.paste(sprite, (i * 320 // frames, 80))
+        images.append(frame)
+    images[0].save(path, save_all=True, append_images=images[1:], duration=40, loop=0)
+    return path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure animated Braille rendering")
+    parser.add_argument('image', nargs='?', help='Animated image (default: generated 640x480 GIF)')
+    parser.add_argument('--frames', type=int, default=48, help='Frames in the generated GIF')
+    parser.add_argument('--cols', type=int, nargs='+', default=[80, 160], help='Render widths')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1],
+                        help='Worker process counts to compare')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.image or make_sample(os.path.join(tmp, 'sample.gif'), args.frames)
+        print(f"{'cols':>5} {'workers':>8} {'frames':>7} {'seconds':>8} {'frames/s':>9} "
+              f"{'full chars':>11} {'diff chars':>11}")
+        for cols in args.cols:
+            for workers in sorted(set(args.workers)):
+                animation = render_animation(path, cols=cols, threshold=128, workers=workers)
+                full = sum(len(braille_from_codes(codes, animation.cols, animation.rows))
+                           for codes in animation.frames)
+                diff = len(braille_from_codes(animation.frames[0], animation.cols, animation.rows)) + sum(
+                    len(frame_updates(previous, codes, animation.cols))
+                    for previous, codes in zip(animation.frames, animation.frames[1:]))
+                print(f"{cols:>5} {workers:>8} {len(animation):>7} {animation.seconds:>8.3f} "
+                      f"{animation.fps:>9.1f} {full:>11} {diff:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark decode-time downscaling (textart.fit_to_cells) against decoding at
+full resolution and resizing afterwards. Without arguments, 12-megapixel JPEGs
+are generated from the sample images in the repository.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PIL import Image, ImageChops
+from textart import fit_to_cells, image_to_braille, load_image, resize_to_cells
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = ['devil.jpeg', 'pictologo.png']
+
+
+def make_samples(directory):
+    """Upscale the repository samples to 4000x3000 JPEGs"""
+    paths = []
+    for name in SAMPLES:
+        path = os.path.join(directory, os.path.splitext(name)[0] + '-12mp.jpg')
+        img = Image.open(os.path.join(REPO_DIR, name)).convert('RGB')
+        img.resize((4000, 3000), Image.BICUBIC).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def best_time(func, repeat):
+    """Return (fastest seconds, last result) over ``repeat`` runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure decode-time downscaling")
+    parser.add_argument('images', nargs='*', help='JPEG/PNG files (default: generated 12MP samples)')
+    parser.add_argument('--cols', type=int, default=120, help='Target number of Braille columns')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is kept)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.images or make_samples(tmp)
+        print(f"{'image':<24} {'full decode':>12} {'draft/reduce':>13} {'speedup':>8} {'max px diff':>12} {'cells diff':>11}")
+        for path in paths:
+            full_time, full = best_time(lambda: resize_to_cells(load_image(path), cols=args.cols), args.repeat)
+            fast_time, fast = best_time(lambda: fit_to_cells(Image.open(path), cols=args.cols, mode='L'), args.repeat)
+
+            pixel_diff = max(ImageChops.difference(full, fast).getextrema())
+            with contextlib.redirect_stderr(io.StringIO()):
+                full_art = image_to_braille(full, threshold=128)
+                fast_art = image_to_braille(fast, threshold=128)
+            cells_diff = sum(a != b for a, b in zip(full_art, fast_art))
+
+            name = os.path.basename(path)
+            print(f"{name:<24} {full_time * 1000:>10.1f}ms {fast_time * 1000:>11.1f}ms "
+                  f"{full_time / fast_time:>7.1f}x {pixel_diff:>12} {cells_diff:>5}/{len(full_art)}")
+
+
+if __name__ == '__main__':
+    main()
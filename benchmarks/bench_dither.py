@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark every dithering mode of textart.image_to_braille against the plain
+threshold, per rendering engine.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PIL import Image
+from textart import DITHER_MODES, fit_to_cells, image_to_braille, np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def best_time(func, repeat):
+    """Return (fastest seconds, last result) over ``repeat`` runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure dithering cost")
+    parser.add_argument('image', nargs='?', default=os.path.join(REPO_DIR, 'devil.jpeg'), help='Image file')
+    parser.add_argument('--cols', type=int, default=300, help='Target number of Braille columns')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (best is kept)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    img = fit_to_cells(Image.open(args.image), cols=args.cols, mode='L')
+    engines = (['numpy'] if np is not None else []) + ['python']
+
+    print(f"{img.width}x{img.height} px")
+    print(f"{'engine':<8} {'dither':<16} {'time':>9} {'vs none':>8}")
+    with contextlib.redirect_stderr(io.StringIO()):
+        for engine in engines:
+            baseline = None
+            for mode in DITHER_MODES:
+                repeat = 1 if engine == 'python' and mode == 'atkinson' else args.repeat
+                seconds, _ = best_time(
+                    lambda: image_to_braille(img, threshold=128, engine=engine, dither=mode), repeat)
+                baseline = baseline or seconds
+                print(f"{engine:<8} {mode:<16} {seconds * 1000:>7.1f}ms {seconds / baseline:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
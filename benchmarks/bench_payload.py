@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Measure /api/braille response sizes and server latency for the JSON and raw
+cell-code formats, uncompressed and with each supported Content-Encoding.
+Requests go through Flask's test client with the render already cached, so
+latency covers serialization and compression only.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from compression import ENCODINGS
+from web_server import app
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(client, image, cols, wire_format, encoding, repeat):
+    """Return (body bytes, median milliseconds) for one request variant"""
+    headers = {'Accept-Encoding': encoding} if encoding else {}
+    url = f'/api/braille?cols={cols}&threshold=110&format={wire_format}'
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.post(url, data=image, content_type='image/jpeg', headers=headers)
+        timings.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url}: {response.status_code} {response.get_data(as_text=True)}')
+    return len(response.data), statistics.median(timings) * 1000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure Braille payload sizes and encoding latency")
+    parser.add_argument('image', nargs='?', default=os.path.join(REPO_DIR, 'devil.jpeg'), help='JPEG file')
+    parser.add_argument('--cols', type=int, nargs='+', default=[80, 200, 500], help='Render widths')
+    parser.add_argument('--repeat', type=int, default=20, help='Requests per variant (median is kept)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with open(args.image, 'rb') as f:
+        image = f.read()
+    client = app.test_client()
+
+    print(f"{'cols':>5} {'format':<7} {'encoding':<9} {'bytes':>9} {'vs json':>8} {'latency':>9}")
+    with contextlib.redirect_stderr(io.StringIO()):
+        for cols in args.cols:
+            baseline = None
+            for wire_format in ('json', 'codes'):
+                for encoding in (None,) + ENCODINGS:
+                    size, latency = measure(client, image, cols, wire_format, encoding, args.repeat)
+                    baseline = baseline or size
+                    print(f"{cols:>5} {wire_format:<7} {encoding or 'identity':<9} {size:>9} "
+                          f"{size / baseline:>7.1%} {latency:>7.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
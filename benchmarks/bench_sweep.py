@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark textart.braille_threshold_sweep against calling image_to_braille once
+per threshold, for each rendering engine, and check that both give the same art.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PIL import Image
+from textart import braille_threshold_sweep, fit_to_cells, image_to_braille, np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def best_time(func, repeat):
+    """Return (fastest seconds, last result) over ``repeat`` runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure threshold sweeps")
+    parser.add_argument('image', nargs='?', default=os.path.join(REPO_DIR, 'devil.jpeg'), help='Image file')
+    parser.add_argument('--cols', type=int, default=200, help='Target number of Braille columns')
+    parser.add_argument('--step', type=int, default=4, help='Sweep thresholds 0-255 with this step')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is kept)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    img = fit_to_cells(Image.open(args.image), cols=args.cols, mode='L')
+    thresholds = list(range(0, 256, args.step))
+    engines = ['python'] + (['numpy'] if np is not None else [])
+
+    print(f"{img.width}x{img.height} px, {len(thresholds)} thresholds")
+    print(f"{'engine':<8} {'one by one':>14} {'sweep':>10} {'speedup':>8} {'same':>5}")
+    for engine in engines:
+        with contextlib.redirect_stderr(io.StringIO()):
+            loop_time, loop = best_time(
+                lambda: {t: image_to_braille(img, threshold=t, engine=engine) for t in thresholds}, args.repeat)
+            sweep_time, sweep = best_time(
+                lambda: braille_threshold_sweep(img, thresholds, engine=engine), args.repeat)
+        print(f"{engine:<8} {loop_time * 1000:>12.1f}ms {sweep_time * 1000:>8.1f}ms "
+              f"{loop_time / sweep_time:>7.1f}x {str(loop == sweep):>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark the threshold modes of textart.image_to_braille per rendering engine.
+The adaptive modes are timed at several window sizes to show that their cost
+does not grow with the window.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PIL import Image
+from textart import fit_to_cells, image_to_braille, np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def best_time(func, repeat):
+    """Return (fastest seconds, last result) over ``repeat`` runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure threshold mode cost")
+    parser.add_argument('image', nargs='?', default=os.path.join(REPO_DIR, 'devil.jpeg'), help='Image file')
+    parser.add_argument('--cols', type=int, default=300, help='Target number of Braille columns')
+    parser.add_argument('--block-sizes', type=int, nargs='+', default=[3, 15, 63, 255],
+                        help='Window sizes for the adaptive modes')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (best is kept)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    img = fit_to_cells(Image.open(args.image), cols=args.cols, mode='L')
+    engines = (['numpy'] if np is not None else []) + ['python']
+
+    print(f"{img.width}x{img.height} px")
+    print(f"{'engine':<8} {'mode':<9} {'block':>6} {'time':>9} {'vs global':>10}")
+    with contextlib.redirect_stderr(io.StringIO()):
+        for engine in engines:
+            repeat = args.repeat if engine == 'numpy' else 1
+            cases = [('global', None), ('otsu', None)]
+            cases += [(mode, block) for mode in ('mean', 'gaussian') for block in args.block_sizes]
+            baseline = None
+            for mode, block in cases:
+                options = {'block_size': block} if block else {}
+                seconds, _ = best_time(
+                    lambda: image_to_braille(img, threshold=128, engine=engine, threshold_mode=mode, **options),
+                    repeat)
+                baseline = baseline or seconds
+                print(f"{engine:<8} {mode:<9} {block or '-':>6} {seconds * 1000:>7.1f}ms "
+                      f"{seconds / baseline:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
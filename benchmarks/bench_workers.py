@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark textart.image_to_braille across worker counts.
+Prints the render time and speedup for 1..N worker processes.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from textart import image_to_braille, load_image, resize_to_cells, ENGINES
+
+
+def best_time(func, repeat):
+    """Return the fastest of ``repeat`` runs of ``func`` in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure the speedup of parallel Braille rendering")
+    parser.add_argument('image', nargs='?', default='pictologo.png', help='Image to render')
+    parser.add_argument('--cols', type=int, default=500, help='Target number of Braille columns')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1,
+                        help='Highest worker count to measure')
+    parser.add_argument('--engine', choices=ENGINES, default='auto', help='Rendering engine')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per worker count (best is kept)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    img = resize_to_cells(load_image(args.image), cols=args.cols)
+    cols, rows = img.size[0] // 2, img.size[1] // 4
+    print(f"{args.image}: {cols}x{rows} cells, engine={args.engine}, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>8}")
+
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        def render():
+            with contextlib.redirect_stderr(io.StringIO()):
+                image_to_braille(img, threshold=128, engine=args.engine, workers=workers)
+        render()  # warm up the process pool
+        seconds = best_time(render, args.repeat)
+        baseline = baseline or seconds
+        print(f"{workers:>8} {seconds:>10.4f} {baseline / seconds:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Load test for the /api/braille endpoint.
+Posts fixed-size generated images from several concurrent clients and reports
+requests/sec and latency percentiles. Start the server with
+BRAILLEPIXEL_CACHE_ENTRIES=0 to measure uncached renders.
+
+    python benchmarks/load_test.py --url http://localhost:5000 --concurrency 8
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PIL import Image
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_payload(size, cols):
+    """JSON body with a JPEG of the given size made from the sample logo"""
+    img = Image.open(os.path.join(REPO_DIR, 'pictologo.png')).convert('RGB').resize(size, Image.BICUBIC)
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=90)
+    data_url = 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+    return json.dumps({'image': data_url, 'cols': cols}).encode()
+
+
+def run(url, payload, concurrency, duration):
+    """Hammer ``url`` for ``duration`` seconds; return (latencies, errors, elapsed)"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        while time.perf_counter() < deadline:
+            request = urllib.request.Request(url, data=payload, headers={'Content-Type': 'application/json'})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    response.read()
+                ok = True
+            except (urllib.error.URLError, OSError) as e:
+                ok = False
+                error = str(e)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors.append(error)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else float('nan')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure /api/braille throughput")
+    parser.add_argument('--url', default='http://localhost:5000', help='Server base URL')
+    parser.add_argument('--sizes', default='640x480,1920x1080', help='Comma-separated image sizes to test')
+    parser.add_argument('--cols', type=int, default=100, help='Braille columns requested')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per image size')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    endpoint = args.url.rstrip('/') + '/api/braille'
+    print(f"{endpoint}: {args.concurrency} clients, {args.duration:.0f}s per size, {args.cols} cols")
+    print(f"{'size':>10} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for size in args.sizes.split(','):
+        width, height = (int(n) for n in size.lower().split('x'))
+        payload = make_payload((width, height), args.cols)
+        latencies, errors, elapsed = run(endpoint, payload, args.concurrency, args.duration)
+        print(f"{size:>10} {len(latencies):>9} {len(errors):>7} {len(latencies) / elapsed:>8.1f} "
+              f"{percentile(latencies, 0.5) * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} "
+              f"{percentile(latencies, 0.99) * 1000:>8.1f}")
+        if errors:
+            print(f"  first error: {errors[0]}")
+
+
+if __name__ == '__main__':
+    main()
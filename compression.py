@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+HTTP response compression
+Content-Encoding negotiation plus whole-body and chunk-by-chunk encoders for
+gzip and, when the optional ``brotli`` package is installed, Brotli. Braille
+art is highly repetitive, so large renders shrink several-fold.
+"""
+
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+# Supported encodings, in the server's order of preference
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Mimetypes worth compressing
+COMPRESSIBLE_TYPES = {'application/json', 'application/x-ndjson', 'application/octet-stream',
+                      'text/plain', 'text/html', 'text/css', 'application/javascript'}
+
+GZIP_LEVEL = int(os.environ.get('BRAILLEPIXEL_GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('BRAILLEPIXEL_BROTLI_QUALITY', 5))
+
+
+def negotiate(accept_encodings):
+    """Pick an encoding from a werkzeug Accept-Encoding header value, or None"""
+    return accept_encodings.best_match(ENCODINGS)
+
+
+def compress(data, encoding):
+    """Compress a whole response body"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    """Compress an iterable of byte chunks, flushing after each one.
+
+    Flushing keeps a streamed response incremental: every chunk the client
+    receives decodes to everything sent so far.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
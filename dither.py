@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Dithering for Braille art
+Turns a grayscale image into a dot mask with error diffusion (Floyd-Steinberg,
+Atkinson) or ordered (Bayer) dithering, so mid-tones survive as dot density
+instead of being cut off by a single threshold.
+"""
+
+from functools import lru_cache
+
+from PIL import Image, ImageChops
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; every mode has a Pillow / pure-Python path
+    np = None
+
+# Dithering modes accepted by dither() and image_to_braille(dither=...)
+DITHER_MODES = ("none", "floyd-steinberg", "atkinson", "bayer2", "bayer4", "bayer8")
+
+
+def dither(img, mode, threshold=128, invert=False, use_numpy=None):
+    """Dither a grayscale "L" image into a Braille dot mask.
+
+    Returns an "L" image of the same size that is 0 where a dot should be set
+    and 255 elsewhere. As with a plain threshold, dots mark pixels darker than
+    ``threshold`` (lighter with ``invert``); here ``threshold`` is the midpoint
+    the dither is centered on, so 128 is neutral and other values make the
+    result darker or lighter.
+
+    ``use_numpy`` picks the NumPy kernels (default: when NumPy is installed);
+    both paths give identical masks.
+    """
+    if mode not in DITHER_MODES or mode == "none":
+        raise ValueError(f"Unknown dither mode {mode!r}, expected one of {', '.join(DITHER_MODES[1:])}")
+    if use_numpy is None:
+        use_numpy = np is not None
+    if img.mode != "L":
+        img = img.convert("L")
+    # Inverted art sets dots on light pixels: flip values and threshold so
+    # every kernel only has to handle "dot where darker than the threshold"
+    if invert:
+        img = img.point(lambda v: 255 - v)
+        threshold = 255 - threshold
+
+    if mode == "floyd-steinberg":
+        return _floyd_steinberg(img, threshold)
+    if mode == "atkinson":
+        return _atkinson_numpy(img, threshold) if use_numpy else _atkinson_python(img, threshold)
+    n = int(mode[len("bayer"):])
+    return _bayer_numpy(img, n, threshold) if use_numpy else _bayer_pillow(img, n, threshold)
+
+
+def _floyd_steinberg(img, threshold):
+    """Pillow's built-in Floyd-Steinberg, which dithers around 128; other
+    thresholds shift the input by the difference first."""
+    if threshold != 128:
+        shift = 128 - threshold
+        img = img.point(lambda v: min(255, max(0, v + shift)))
+    return img.convert("1", dither=Image.Dither.FLOYDSTEINBERG).convert("L")
+
+
+def _atkinson_numpy(img, threshold):
+    """Atkinson dithering in wavefronts of independent pixels.
+
+    Atkinson pushes 1/8 of each pixel's error to (x+1, y), (x+2, y),
+    (x-1, y+1), (x, y+1), (x+1, y+1) and (x, y+2). Every one of those has a
+    larger x + 2y, so all pixels with the same x + 2y can be quantized at once.
+    The image is stored skewed (row t holds the pixels with x + 2y == t, a
+    contiguous run of image rows), which makes each wavefront one array slice
+    and each error push a shifted slice add.
+    """
+    width, height = img.size
+    steps = width + 2 * height
+    ys = np.arange(height)[:, None]
+    ts = np.arange(width)[None, :] + 2 * ys
+
+    # Values are stored plus an offset so that they index the error table
+    # directly; two spare rows/columns catch error pushed past the edges
+    offset = 1024
+    skew = np.zeros((steps + 4, height + 2), dtype=np.int16)
+    skew[ts, ys] = np.asarray(img, dtype=np.int16) + offset
+    levels = np.arange(-offset, offset, dtype=np.int16)
+    error_lut = np.where(levels < threshold, levels, levels - 255) // 8
+
+    for t in range(steps):
+        y0, y1 = max(0, (t - width) // 2 + 1), min(height, t // 2 + 1)
+        error = error_lut[skew[t, y0:y1]]
+        skew[t + 1:t + 3, y0:y1] += error
+        skew[t + 1:t + 4, y0 + 1:y1 + 1] += error
+        skew[t + 4, y0 + 2:y1 + 2] += error
+
+    # Nothing is pushed back to earlier wavefronts, so each pixel still holds
+    # the value it was quantized with
+    dots = skew[ts, ys] < threshold + offset
+    mask = np.where(dots, 0, 255).astype(np.uint8)
+    return Image.fromarray(mask, "L")
+
+
+def _atkinson_python(img, threshold):
+    """Pure-Python Atkinson dithering, one pixel at a time."""
+    width, height = img.size
+    data = img.tobytes()
+    rows = [list(data[y * width:(y + 1) * width]) for y in range(height)]
+    rows.extend([[0] * width, [0] * width])  # error pushed below the image is dropped
+    out = bytearray(width * height)
+    for y in range(height):
+        row, below, below2 = rows[y], rows[y + 1], rows[y + 2]
+        for x in range(width):
+            value = row[x]
+            if value < threshold:
+                error = value // 8
+            else:
+                error = (value - 255) // 8
+                out[y * width + x] = 255
+            if not error:
+                continue
+            if x + 1 < width:
+                row[x + 1] += error
+                below[x + 1] += error
+            if x + 2 < width:
+                row[x + 2] += error
+            if x:
+                below[x - 1] += error
+            below[x] += error
+            below2[x] += error
+    return Image.frombytes("L", (width, height), bytes(out))
+
+
+@lru_cache(maxsize=None)
+def bayer_matrix(n):
+    """The n x n Bayer index matrix (n a power of two) as a tuple of rows."""
+    if n == 1:
+        return ((0,),)
+    half = bayer_matrix(n // 2)
+    rows = []
+    for offsets in ((0, 2), (3, 1)):
+        for row in half:
+            rows.append(tuple(4 * v + offsets[0] for v in row) + tuple(4 * v + offsets[1] for v in row))
+    return tuple(rows)
+
+
+def bayer_thresholds(n, threshold):
+    """Integer per-position thresholds: a pixel gets a dot when value < T[y][x].
+
+    The thresholds are spread evenly over the 256 levels and centered on
+    ``threshold``; they may fall outside 0-255 for extreme thresholds.
+    """
+    shift = threshold - 128
+    return [[-(-(2 * v + 1) * 128 // (n * n)) + shift for v in row] for row in bayer_matrix(n)]
+
+
+def _bayer_numpy(img, n, threshold):
+    """Ordered dithering: compare every pixel against a tiled threshold matrix."""
+    width, height = img.size
+    pixels = np.asarray(img, dtype=np.int16)
+    tile = np.array(bayer_thresholds(n, threshold), dtype=np.int16)
+    reps = (-(-height // n), -(-width // n))
+    thresholds = np.tile(tile, reps)[:height, :width]
+    return Image.fromarray(np.where(pixels < thresholds, 0, 255).astype(np.uint8), "L")
+
+
+def _tile(tile, size):
+    """Repeat a small image across ``size`` by pasting doubling strips."""
+    width, height = size
+    tile_w, tile_h = tile.size
+    out = Image.new(tile.mode, size)
+    out.paste(tile, (0, 0))
+    filled = tile_w
+    while filled < width:
+        out.paste(out.crop((0, 0, filled, tile_h)), (filled, 0))
+        filled *= 2
+    filled = tile_h
+    while filled < height:
+        out.paste(out.crop((0, 0, width, filled)), (0, filled))
+        filled *= 2
+    return out
+
+
+def _bayer_pillow(img, n, threshold):
+    """_bayer_numpy with Pillow image arithmetic only."""
+    tile = bayer_thresholds(n, threshold)
+    clamped = Image.new("L", (n, n))
+    clamped.putdata([min(255, max(0, t)) for row in tile for t in row])
+    # subtract() clips at 0, so it is non-zero exactly where value < threshold
+    dots = ImageChops.subtract(_tile(clamped, img.size), img).point(lambda d: 0 if d else 255)
+    if any(t > 255 for row in tile for t in row):
+        # Thresholds above 255 set a dot even on white, which clamping loses
+        always = Image.new("L", (n, n))
+        always.putdata([0 if t > 255 else 255 for row in tile for t in row])
+        dots = ImageChops.darker(dots, _tile(always, img.size))
+    return dots
@@ -4,10 +4,14 @@ Emoji Mosaic Generator
 Convert images to emoji art using your chosen emoji
 """
 
-from PIL import Image
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+from functools import lru_cache
 import sys
 import os
 import argparse
+import logging
+
+logger = logging.getLogger('braillepixel.emoji_art')
 
 # Common emoji sets for different styles
 EMOJI_SETS = {
@@ -44,48 +48,110 @@ def image_to_emoji_mosaic(img, emoji_list=None, density_levels=16, on_emoji='
     if img.mode != "L":
         img = img.convert("L")
     
-    pixels = img.load()
-    width, height = img.size
-    
     if binary_mode:
         # Binary mode: use only on_emoji and off_emoji
-        lines = []
-        for y in range(height):
-            line = []
-            for x in range(width):
-                pixel = pixels[x, y]
-                # Use on_emoji for pixels above threshold, off_emoji for below
-                emoji = on_emoji if pixel >= threshold else off_emoji
-                line.append(emoji)
-            lines.append(''.join(line))
-        return '\n'.join(lines)
+        # Use on_emoji for pixels above threshold, off_emoji for below
+        lut = [on_emoji if pixel >= threshold else off_emoji for pixel in range(256)]
     else:
         # Gradient mode: use emoji_list with density levels
         if not emoji_list:
             emoji_list = ['⬛', '⬜']  # Default fallback
-        
-        # Create density map from emoji list
-        if len(emoji_list) < density_levels:
-            # Repeat emojis to reach desired density levels
-            expanded_emoji = []
-            for i in range(density_levels):
-                expanded_emoji.append(emoji_list[i % len(emoji_list)])
-            emoji_list = expanded_emoji
-        else:
-            # Use subset if too many emojis
-            emoji_list = emoji_list[:density_levels]
-        
-        lines = []
-        for y in range(height):
-            line = []
-            for x in range(width):
-                pixel = pixels[x, y]
-                # Map pixel brightness (0-255) to emoji index
-                emoji_index = min(int(pixel / 256 * len(emoji_list)), len(emoji_list) - 1)
-                line.append(emoji_list[emoji_index])
-            lines.append(''.join(line))
-        
-        return '\n'.join(lines)
+        lut = gradient_lut(tuple(emoji_list), density_levels)
+    
+    return render_with_lut(img, lut)
+
+def expand_emoji_list(emoji_list, density_levels):
+    """Repeat or truncate emoji_list to exactly density_levels entries"""
+    if len(emoji_list) < density_levels:
+        # Repeat emojis to reach desired density levels
+        return [emoji_list[i % len(emoji_list)] for i in range(density_levels)]
+    # Use subset if too many emojis
+    return list(emoji_list[:density_levels])
+
+@lru_cache(maxsize=64)
+def gradient_lut(emoji_list, density_levels=16):
+    """
+    Build the 256-entry brightness -> emoji lookup table for gradient mode
+    
+    Args:
+        emoji_list: Tuple of emojis (hashable, so tables are cached per set)
+        density_levels: Number of density levels
+    """
+    levels = expand_emoji_list(emoji_list, density_levels)
+    # Map pixel brightness (0-255) to emoji index
+    return tuple(levels[min(int(pixel / 256 * len(levels)), len(levels) - 1)] for pixel in range(256))
+
+def render_with_lut(img, lut):
+    """Render a grayscale image by mapping every pixel value through a 256-entry table"""
+    width, height = img.size
+    data = img.tobytes()
+    lookup = lut.__getitem__
+    return '\n'.join(''.join(map(lookup, data[y * width:(y + 1) * width])) for y in range(height))
+
+# TrueType fonts tried in order when the font registry is first used
+FONT_PATHS = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/System/Library/Fonts/Helvetica.ttc",  # macOS
+    "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",  # Some Linux
+    "/Windows/Fonts/arial.ttf",  # Windows
+]
+
+@lru_cache(maxsize=None)
+def get_font(font_size=60):
+    """
+    Return (font, font_size) for text rendering, resolved once per process
+    
+    The first loadable entry of FONT_PATHS is used; if none can be loaded the
+    Pillow default font is returned with a nominal size of 30.
+    """
+    for path in FONT_PATHS:
+        try:
+            return ImageFont.truetype(path, font_size), font_size
+        except OSError:
+            continue
+    # Fallback to default
+    return ImageFont.load_default(), 30
+
+@lru_cache(maxsize=1024)
+def glyph_mask(font, char):
+    """
+    Rasterize one character, cached per (font, character)
+    
+    Fonts come from get_font(), so a font object stands for its file and size.
+    Returns (mask, bbox, advance): an "L" coverage mask cropped to the glyph's
+    bounding box, that box relative to the pen position, and the advance width.
+    """
+    bbox = font.getbbox(char)
+    mask = Image.new('L', (max(0, bbox[2] - bbox[0]), max(0, bbox[3] - bbox[1])), 0)
+    ImageDraw.Draw(mask).text((-bbox[0], -bbox[1]), char, font=font, fill=255)
+    return mask, bbox, font.getlength(char)
+
+def compose_text_mask(text, font, padding=0):
+    """Build the coverage mask of ``text`` (plus padding) from cached glyph masks"""
+    placed = []
+    pen_x = 0
+    for char in text:
+        mask, bbox, advance = glyph_mask(font, char)
+        if mask.width and mask.height:
+            placed.append((pen_x, mask, bbox))
+        pen_x += advance
+    
+    if placed:
+        left = min(round(x + bbox[0]) for x, _mask, bbox in placed)
+        top = min(bbox[1] for _x, _mask, bbox in placed)
+        right = max(round(x + bbox[0]) + mask.width for x, mask, bbox in placed)
+        bottom = max(bbox[3] for _x, _mask, bbox in placed)
+    else:
+        left = top = right = bottom = 0
+    
+    # Same canvas as drawing at (padding, padding): the text box plus padding
+    text_mask = Image.new('L', (right - left + 2 * padding, bottom - top + 2 * padding), 0)
+    for x, mask, bbox in placed:
+        box = (padding + round(x + bbox[0]), padding + bbox[1])
+        # Overlapping glyphs keep the strongest coverage, as in a single FreeType render
+        region = text_mask.crop((box[0], box[1], box[0] + mask.width, box[1] + mask.height))
+        text_mask.paste(ImageChops.lighter(region, mask), box)
+    return text_mask
 
 def text_to_emoji_art(text, on_emoji='🔥', off_emoji='⚪', width=80, binary_threshold=128):
     """
@@ -98,60 +164,26 @@ def text_to_emoji_art(text, on_emoji='🔥', off_emoji='⚪', width=80, binary_t
         width: Target width in characters
         binary_threshold: Brightness threshold for binary conversion (0-255)
     """
-    from PIL import ImageFont, ImageDraw
-    
     try:
-        # Try to load a font (adjust path as needed)
-        font_size = 60
-        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", font_size)
-    except:
-        try:
-            # Try other common font locations
-            font_paths = [
-                "/System/Library/Fonts/Helvetica.ttc",  # macOS
-                "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",  # Some Linux
-                "/Windows/Fonts/arial.ttf",  # Windows
-            ]
-            font = None
-            for path in font_paths:
-                try:
-                    font = ImageFont.truetype(path, font_size)
-                    break
-                except:
-                    continue
-            
-            if not font:
-                # Fallback to default
-                font = ImageFont.load_default()
-                font_size = 30
-        except:
-            print("Warning: Could not load font, text rendering may not work properly")
-            # Return simple replacement as fallback
-            result = []
-            for char in text:
-                if char == ' ':
-                    result.append(off_emoji * 3)  # Space between words
-                else:
-                    result.append(on_emoji * 3)  # Simple block per character
-            return '\n'.join([' '.join(result)])
-    
-    # Calculate image size needed for text
-    bbox = font.getbbox(text)
-    text_width = bbox[2] - bbox[0]
-    text_height = bbox[3] - bbox[1]
+        font, font_size = get_font()
+    except Exception:
+        logger.warning("Could not load font, text rendering may not work properly")
+        # Return simple replacement as fallback
+        result = []
+        for char in text:
+            if char == ' ':
+                result.append(off_emoji * 3)  # Space between words
+            else:
+                result.append(on_emoji * 3)  # Simple block per character
+        return '\n'.join([' '.join(result)])
     
     # Add padding for better rendering
     padding = max(20, font_size // 4)
-    img_width = text_width + 2 * padding
-    img_height = text_height + 2 * padding
     
-    # Create image with text (white background, black text)
-    img = Image.new('RGB', (img_width, img_height), color='white')
-    draw = ImageDraw.Draw(img)
-    draw.text((padding, padding), text, font=font, fill='black')
+    # Compose the text from cached glyph masks (white background, black text)
+    img = ImageChops.invert(compose_text_mask(text, font, padding))
     
-    # Convert to grayscale and resize
-    img = img.convert('L')
+    # Resize
     img = resize_image(img, width)
     
     # Convert to binary emoji art for better text clarity
@@ -0,0 +1,84 @@
+"""
+Gunicorn settings for running the BraillePixel API in production:
+
+    gunicorn -c gunicorn.conf.py web_server:app
+
+or `python web_server.py --production`. Every value can be overridden with
+the BRAILLEPIXEL_* environment variables below.
+"""
+
+import atexit
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+
+def remove_run_dir(path, owner_pid):
+    # Forked workers inherit the atexit hook; only the master cleans up
+    if os.getpid() == owner_pid:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+bind = os.environ.get('BRAILLEPIXEL_BIND', '0.0.0.0:5000')
+
+# Rendering is CPU-bound, so one pre-forked worker per core. Each worker
+# serves requests from a few threads: the sync worker closes every connection
+# after its response, while threaded workers can keep connections alive and
+# wait on slow clients without holding up the CPU.
+workers = int(os.environ.get('BRAILLEPIXEL_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('BRAILLEPIXEL_THREADS', 4))
+
+# Uploaded images (the image_id API) are shared by the workers through
+# BRAILLEPIXEL_IMAGE_DIR (see image_store.py). Unless it is set, each run gets
+# a private directory in memory-backed /dev/shm that the master removes when
+# it exits. Set empty, an image only exists in the worker that received the
+# upload, so there must be just one.
+if 'BRAILLEPIXEL_IMAGE_DIR' not in os.environ:
+    image_dir = tempfile.mkdtemp(prefix='braillepixel-images-',
+                                 dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+    os.environ['BRAILLEPIXEL_IMAGE_DIR'] = image_dir
+    atexit.register(remove_run_dir, image_dir, os.getpid())
+elif not os.environ['BRAILLEPIXEL_IMAGE_DIR']:
+    workers = 1
+
+# One render pool for the async API on the whole host, started in the master
+# before the workers fork; the workers submit to it, so both its size and its
+# queue limit (503 once that many renders are in flight) are host-wide
+render_workers = int(os.environ.get('BRAILLEPIXEL_RENDER_WORKERS', 0)) or multiprocessing.cpu_count()
+render_queue = int(os.environ.get('BRAILLEPIXEL_RENDER_QUEUE', 0)) or 4 * render_workers
+
+
+def on_starting(server):
+    import render_pool
+    render_pool.start_host_pool(render_workers, render_queue)
+
+
+def on_exit(server):
+    import render_pool
+    render_pool.stop_host_pool()
+
+
+# Keep idle client connections open briefly so browsers can reuse them
+keepalive = int(os.environ.get('BRAILLEPIXEL_KEEPALIVE', 5))
+
+# Kill stuck renders; on SIGTERM give in-flight requests time to finish
+timeout = int(os.environ.get('BRAILLEPIXEL_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('BRAILLEPIXEL_GRACEFUL_TIMEOUT', 30))
+
+# Header limits; the request body limit is Flask's MAX_CONTENT_LENGTH
+limit_request_line = 8190
+limit_request_fields = 100
+limit_request_field_size = 8190
+
+# Recycle workers now and then to bound memory growth
+max_requests = int(os.environ.get('BRAILLEPIXEL_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+# Import the app once in the master so workers share its memory pages
+preload_app = True
+
+accesslog = os.environ.get('BRAILLEPIXEL_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.environ.get('BRAILLEPIXEL_LOG_LEVEL', 'warning').lower()
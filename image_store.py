@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Decoded image store for the upload-once API flow
+An image is uploaded and decoded to grayscale once, then referenced by id from
+render requests, so re-rendering with a different threshold skips the base64
+decode, Image.open and resize. Entries expire after a TTL and the least
+recently used are evicted to stay inside a memory budget.
+
+Under Gunicorn, decoded images are also written to a directory shared by the
+server processes of the run, so an image_id uploaded to one worker can be
+rendered by any other: a worker that does not hold the image maps the file
+into memory.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from PIL import Image
+
+from shared_dir import SharedDirectory
+
+# Header of an image file in the shared directory: magic, width, height; the
+# 8-bit grayscale pixels follow
+SHARED_HEADER = struct.Struct('<4sII')
+SHARED_MAGIC = b'BPL1'
+
+
+class ImageTooLarge(ValueError):
+    """Raised by ImageStore.add when one image exceeds the whole memory budget"""
+
+
+class ImageNotShared(OSError):
+    """Raised by ImageStore.add when the image cannot be written to the shared
+    directory (e.g. /dev/shm is full), so other processes would not find it"""
+
+
+class _Entry:
+    __slots__ = ('image', 'resized', 'nbytes', 'expires')
+
+    def __init__(self, image, expires):
+        self.image = image
+        self.resized = {}
+        self.nbytes = image_nbytes(image)
+        self.expires = expires
+
+
+def image_nbytes(img):
+    """Approximate memory held by a decoded PIL image"""
+    return img.width * img.height * len(img.getbands())
+
+
+class ImageStore:
+    """Thread-safe store of decoded grayscale images keyed by image id.
+
+    Besides the decoded image, each entry memoizes resized copies (e.g. one per
+    cell grid), which count against the same ``max_bytes`` budget. Reading an
+    entry refreshes its TTL.
+
+    With ``shared_dir``, decoded images are also kept in that SharedDirectory,
+    which every process using the same path sees. The files are what counts:
+    an image another process uploaded is mapped in from there, and one it
+    deleted (or that expired or was evicted there) is gone here too.
+
+    Args:
+        ttl: Seconds an unused image is kept (default 600)
+        max_bytes: Memory budget for all decoded and resized images (default
+            256 MB); also the size limit of the shared directory
+        shared_dir: Directory shared with the other processes (default: none)
+    """
+
+    def __init__(self, ttl=600, max_bytes=256 * 1024 * 1024, shared_dir=None):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # image id -> _Entry, least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._shared = SharedDirectory(shared_dir, max_bytes, '.gray', ttl=ttl) if shared_dir else None
+
+    @classmethod
+    def from_env(cls):
+        """Create a store configured by BRAILLEPIXEL_IMAGE_TTL / BRAILLEPIXEL_IMAGE_STORE_MB /
+        BRAILLEPIXEL_IMAGE_DIR (the shared directory; gunicorn.conf.py sets a per-run one)"""
+        return cls(
+            ttl=int(os.environ.get('BRAILLEPIXEL_IMAGE_TTL', 600)),
+            max_bytes=int(os.environ.get('BRAILLEPIXEL_IMAGE_STORE_MB', 256)) * 1024 * 1024,
+            shared_dir=os.environ.get('BRAILLEPIXEL_IMAGE_DIR') or None,
+        )
+
+    def add(self, image_id, img):
+        """Decode ``img`` to grayscale and store it under ``image_id``.
+
+        Re-adding an id that is already stored only refreshes it.
+        Returns the stored grayscale image. Raises ImageTooLarge for an image
+        above the budget and ImageNotShared if the shared directory cannot
+        take it.
+        """
+        with self._lock:
+            entry = self._touch(image_id)
+            if entry is not None:
+                return entry.image
+        gray = img if img.mode == 'L' else img.convert('L')
+        gray.load()
+        if image_nbytes(gray) > self.max_bytes:
+            raise ImageTooLarge(f'Decoded image needs {image_nbytes(gray)} bytes, '
+                                f'store budget is {self.max_bytes}')
+        if self._shared is not None and not self._shared.write(
+                image_id, SHARED_HEADER.pack(SHARED_MAGIC, *gray.size), gray.tobytes()):
+            raise ImageNotShared(f'Could not store the decoded image in {self._shared.path}')
+        with self._lock:
+            self._insert(image_id, gray)
+        return gray
+
+    def get(self, image_id):
+        """Return the stored grayscale image, or None if unknown or expired"""
+        with self._lock:
+            entry = self._touch(image_id)
+            return None if entry is None else entry.image
+
+    def resized(self, image_id, key, resize):
+        """Return ``resize(image)`` for a stored image, computed once per ``key``.
+
+        ``key`` identifies the resize (e.g. the target size) and ``resize`` is a
+        function from the stored grayscale image to the resized one. Returns None
+        if the image id is unknown or expired.
+        """
+        with self._lock:
+            entry = self._touch(image_id)
+            if entry is None:
+                return None
+            if key in entry.resized:
+                return entry.resized[key]
+            img = entry.image
+        resized = resize(img)
+        with self._lock:
+            if self._entries.get(image_id) is not entry:
+                return resized  # evicted meanwhile; don't account for it
+            if key not in entry.resized:
+                nbytes = 0 if resized is img else image_nbytes(resized)
+                entry.resized[key] = resized
+                entry.nbytes += nbytes
+                self._bytes += nbytes
+                self._evict(keep=image_id)
+            return entry.resized[key]
+
+    def discard(self, image_id):
+        """Remove an image; returns whether it was stored"""
+        with self._lock:
+            dropped = self._drop(image_id)
+        if self._shared is not None and self._shared.remove(image_id):
+            return True
+        return dropped
+
+    def __contains__(self, image_id):
+        with self._lock:
+            return self._touch(image_id) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def _touch(self, image_id):
+        entry = self._entries.get(image_id)
+        if entry is None:
+            return self._load_shared(image_id)
+        now = time.monotonic()
+        if entry.expires <= now or (self._shared is not None and not self._shared.touch(image_id)):
+            self._drop(image_id)
+            return None
+        entry.expires = now + self.ttl
+        self._entries.move_to_end(image_id)
+        return entry
+
+    def _load_shared(self, image_id):
+        """Entry for an image that another process put in the shared directory"""
+        if self._shared is None or not self._shared.touch(image_id):
+            return None
+        try:
+            with open(self._shared.file_path(image_id), 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, width, height = SHARED_HEADER.unpack_from(data)
+        except (OSError, ValueError, struct.error):
+            return None
+        if magic != SHARED_MAGIC or len(data) != SHARED_HEADER.size + width * height:
+            return None
+        # Read-only and backed by the file's pages, which all processes share
+        gray = Image.frombuffer('L', (width, height), memoryview(data)[SHARED_HEADER.size:], 'raw', 'L', 0, 1)
+        return self._insert(image_id, gray)
+
+    def _insert(self, image_id, gray):
+        self._drop(image_id)
+        entry = _Entry(gray, time.monotonic() + self.ttl)
+        self._entries[image_id] = entry
+        self._bytes += entry.nbytes
+        self._evict(keep=image_id)
+        return entry
+
+    def _drop(self, image_id):
+        entry = self._entries.pop(image_id, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.nbytes
+        return True
+
+    def _evict(self, keep=None):
+        now = time.monotonic()
+        for image_id in [i for i, entry in self._entries.items() if entry.expires <= now]:
+            self._drop(image_id)
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(oldest)
+                continue
+            self._drop(oldest)
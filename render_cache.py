@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Content-addressed render cache
+Keeps generated art keyed by a hash of the input image bytes plus the
+normalized render parameters, in a bounded in-memory LRU with an optional
+size-limited on-disk tier that every server process on the host can share.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from shared_dir import SharedDirectory
+
+
+def hash_image(source, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of image file bytes.
+
+    ``source`` is a bytes-like object or a seekable binary file, which is read in
+    chunks and rewound afterwards so it can still be passed to Image.open.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    source.seek(0)
+    for chunk in iter(lambda: source.read(chunk_size), b''):
+        digest.update(chunk)
+    source.seek(0)
+    return digest.hexdigest()
+
+
+def make_key(kind, image_digest=None, **params):
+    """Build a cache key for one render.
+
+    Args:
+        kind: Render type ('braille', 'emoji', 'ascii', ...)
+        image_digest: hash_image() digest of the raw image file bytes, if any
+        **params: Render parameters, already normalized by the caller
+    """
+    digest = hashlib.sha256()
+    digest.update(kind.encode('utf-8'))
+    digest.update(b'\0')
+    if image_digest is not None:
+        digest.update(image_digest.encode('ascii'))
+    digest.update(json.dumps(params, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Thread-safe two-tier cache of rendered art strings.
+
+    The memory tier is an LRU holding at most ``max_entries`` results. When
+    ``disk_dir`` is set, results are also written there and the least recently
+    used files are deleted once the directory grows past ``disk_max_bytes``.
+    A disk hit is promoted back into memory.
+
+    The disk tier is a SharedDirectory, so several processes (e.g. Gunicorn
+    workers) can share one directory: a result written by one is a hit for
+    all, and the size limit holds for the directory as a whole.
+    """
+
+    def __init__(self, max_entries=256, disk_dir=None, disk_max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = SharedDirectory(disk_dir, disk_max_bytes, '.txt') if disk_dir else None
+
+    @classmethod
+    def from_env(cls):
+        """Create a cache configured from BRAILLEPIXEL_CACHE_* environment variables"""
+        return cls(
+            max_entries=int(os.environ.get('BRAILLEPIXEL_CACHE_ENTRIES', 256)),
+            disk_dir=os.environ.get('BRAILLEPIXEL_CACHE_DIR') or None,
+            disk_max_bytes=int(os.environ.get('BRAILLEPIXEL_CACHE_DISK_MB', 256)) * 1024 * 1024,
+        )
+
+    def get(self, key):
+        """Return the cached result for ``key`` or None"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            if self._disk is None:
+                return None
+            try:
+                with open(self._disk.file_path(key), encoding='utf-8') as f:
+                    value = f.read()
+            except OSError:
+                return None
+            self._disk.touch(key)
+            self._remember(key, value)
+            return value
+
+    def put(self, key, value):
+        """Store ``value`` under ``key`` in memory and, if enabled, on disk"""
+        with self._lock:
+            self._remember(key, value)
+            if self._disk is not None:
+                self._disk.write(key, value.encode('utf-8'))
+
+    def clear(self):
+        """Drop every cached result from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                self._disk.clear()
+
+    def __len__(self):
+        return len(self._memory)
+
+    def _remember(self, key, value):
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
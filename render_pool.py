@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Bounded process pool for CPU-bound renders
+Image decoding and art generation run in worker processes so they never hold
+the web server's GIL; when too many renders are queued, new work is refused
+instead of piling up. Under a pre-forking server one pool serves the whole
+host (see start_host_pool).
+"""
+
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.managers import BaseManager
+
+from PIL import Image
+
+from textart import image_to_braille, fit_to_cells
+from emoji_art import image_to_emoji_mosaic, resize_image
+
+
+class PoolSaturated(Exception):
+    """Raised by RenderPool.submit when the queue-depth limit is reached"""
+
+
+class RenderPool:
+    """A ProcessPoolExecutor with a cap on queued plus running jobs.
+
+    Args:
+        workers: Worker processes (default: one per CPU)
+        max_pending: Jobs allowed in flight before submit() raises PoolSaturated
+            (default: four per worker)
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.workers
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    @classmethod
+    def from_env(cls):
+        """Create a pool sized by BRAILLEPIXEL_RENDER_WORKERS / BRAILLEPIXEL_RENDER_QUEUE"""
+        return cls(
+            workers=int(os.environ.get('BRAILLEPIXEL_RENDER_WORKERS', 0)) or None,
+            max_pending=int(os.environ.get('BRAILLEPIXEL_RENDER_QUEUE', 0)) or None,
+        )
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule ``fn(*args, **kwargs)`` in a worker and return its Future"""
+        if not self._slots.acquire(blocking=False):
+            raise PoolSaturated(f'{self.max_pending} renders already in progress')
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _future: self._slots.release())
+        return future
+
+    def run(self, fn, args=(), kwargs=None):
+        """submit() and wait for the result (what HostRenderPool calls remotely)"""
+        return self.submit(fn, *args, **(kwargs or {})).result()
+
+    def limits(self):
+        """(workers, max_pending)"""
+        return self.workers, self.max_pending
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+class _HostPoolManager(BaseManager):
+    """Serves the one RenderPool of a host to every process forked after it started"""
+
+
+# The RenderPool, inside the manager's server process
+_host_pool = None
+
+# The started manager, in the process that called start_host_pool() and in
+# everything forked from it (e.g. Gunicorn workers)
+_host_manager = None
+
+
+def _create_host_pool(workers, max_pending):
+    global _host_pool
+    _host_pool = RenderPool(workers, max_pending)
+
+
+def _get_host_pool():
+    return _host_pool
+
+
+_HostPoolManager.register('pool', callable=_get_host_pool, exposed=('run', 'limits'))
+
+
+def start_host_pool(workers=None, max_pending=None):
+    """Start one render pool for the whole host in a server process.
+
+    Call it in a pre-forking server's master before the workers fork (see
+    gunicorn.conf.py). host_pool() in the workers then returns a client of
+    this pool, so its size and queue-depth limit apply to the host as a whole
+    instead of to every worker. Arguments are as for RenderPool.
+    """
+    global _host_manager
+    manager = _HostPoolManager()
+    manager.start(_create_host_pool, (workers, max_pending))
+    _host_manager = manager
+    os.register_at_fork(after_in_child=_forget_host_process)
+    return manager
+
+
+def _forget_host_process():
+    # Forked workers inherit the list of multiprocessing children, but the
+    # manager's server process is not theirs to join when they exit
+    if _host_manager is not None:
+        multiprocessing.process._children.discard(_host_manager._process)
+
+
+def stop_host_pool():
+    """Shut down the pool started by start_host_pool()"""
+    global _host_manager
+    if _host_manager is not None:
+        _host_manager.shutdown()
+        _host_manager = None
+
+
+def host_pool():
+    """A HostRenderPool for the pool started by start_host_pool(), or None if none was"""
+    if _host_manager is None:
+        return None
+    return HostRenderPool(_host_manager.pool())
+
+
+class HostRenderPool:
+    """Client of the host-wide pool, with the same submit() as RenderPool.
+
+    Each job is sent to the pool's server process from a waiter thread, which
+    blocks until the result is back; PoolSaturated comes back from the server
+    when the host-wide limit is reached.
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+        self.workers, self.max_pending = pool.limits()
+        # The server never runs more than max_pending jobs, so neither do the waiters
+        self._waiters = ThreadPoolExecutor(max_workers=self.max_pending)
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule ``fn(*args, **kwargs)`` in the host pool and return its Future"""
+        return self._waiters.submit(self._pool.run, fn, args, kwargs)
+
+    def shutdown(self, wait=True):
+        self._waiters.shutdown(wait=wait)
+
+
+def render_braille_job(image_bytes, cols=80, rows=None, **options):
+    """Worker job: decode image file bytes and render Braille art (``options``
+    are image_to_braille() arguments)"""
+    img = fit_to_cells(Image.open(io.BytesIO(image_bytes)), cols=cols, rows=rows)
+    return image_to_braille(img, **options)
+
+
+def render_emoji_job(image_bytes, width=80, **params):
+    """Worker job: decode image file bytes and render an emoji mosaic"""
+    img = resize_image(Image.open(io.BytesIO(image_bytes)), width)
+    return image_to_emoji_mosaic(img, **params)
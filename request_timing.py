@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Per-request stage timings
+A RequestTimer adds up how long each stage of one request takes (decode,
+resize, render, serialize, ...). The web server logs one JSON line per request
+with those timings to the braillepixel.timing logger.
+"""
+
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+
+class RequestTimer:
+    """Wall-clock seconds spent in each named stage of a request.
+
+    Use ``with timer.stage('render'): ...``; a stage entered several times
+    accumulates. Stages may nest: time spent in an inner stage counts only
+    for that stage, so the stages never add up to more than the total.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._active = []  # [name, start of its current uninterrupted stretch]
+
+    def _add(self, entry, now):
+        name, start = entry
+        self.stages[name] = self.stages.get(name, 0.0) + now - start
+
+    @contextmanager
+    def stage(self, name):
+        now = time.perf_counter()
+        if self._active:
+            self._add(self._active[-1], now)
+        self._active.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._add(self._active.pop(), now)
+            if self._active:
+                self._active[-1][1] = now
+
+    def record(self, **fields):
+        """JSON-serializable dict of ``fields`` plus total_ms and <stage>_ms for each stage"""
+        record = dict(fields)
+        record['total_ms'] = round((time.perf_counter() - self.started) * 1000, 3)
+        for name, seconds in self.stages.items():
+            record[f'{name}_ms'] = round(seconds * 1000, 3)
+        return record
+
+
+def timing_logger_from_env():
+    """The braillepixel.timing logger, set up from BRAILLEPIXEL_TIMING_LOG.
+
+    When the variable names a file (or '-' for stderr), each record is written
+    there as a bare JSON line. Otherwise the logger is left to the normal
+    logging setup, where records show at INFO level.
+    """
+    logger = logging.getLogger('braillepixel.timing')
+    path = os.environ.get('BRAILLEPIXEL_TIMING_LOG')
+    if path and not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr) if path == '-' else logging.FileHandler(path, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Size-limited file directory shared by the server processes on a host
+The render cache's disk tier and the image store keep files here so that
+every Gunicorn worker sees what any other worker wrote. There is no
+per-process index: the directory itself is the index, recency is the files'
+mtime, and the total size is kept in a file updated under an exclusive lock.
+"""
+
+import os
+import re
+import stat
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # No flock on Windows; there a directory must not be shared between processes
+    fcntl = None
+
+# File in the directory that is locked while the directory changes and holds
+# the total size of its files
+TOTAL_FILE = '.total'
+
+# File names are keys such as hex digests, never paths
+_NAME = re.compile(r'[0-9A-Za-z_-]+')
+
+
+def check_private(path):
+    """Raise PermissionError unless ``path`` is a real directory (not a
+    symlink) that belongs to this user and is closed to everyone else"""
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f'{path} is not a directory')
+    if hasattr(os, 'getuid') and (info.st_uid != os.getuid() or info.st_mode & 0o077):
+        raise PermissionError(f'{path} must belong to this user with mode 0700, '
+                              f'found uid {info.st_uid} mode {stat.S_IMODE(info.st_mode):o}')
+
+
+class SharedDirectory:
+    """Files keyed by name, shared by every process that opens ``path``.
+
+    A write that takes the directory past ``max_bytes`` deletes the least
+    recently used files; with ``ttl``, files unused for that many seconds
+    count as gone and are deleted as well. Existing files are recounted, and
+    trimmed to the limit, when the directory is opened.
+
+    The directory and its files are private to the user running the server;
+    an existing directory that others could read or plant files in is refused
+    with PermissionError.
+
+    Args:
+        path: The directory (created with mode 0700 if missing)
+        max_bytes: Size limit for all files together
+        suffix: File name extension of the stored files
+        ttl: Seconds an unused file is kept (default: until evicted)
+    """
+
+    def __init__(self, path, max_bytes, suffix, ttl=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.ttl = ttl
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        check_private(path)
+        with self._locked_total() as total:
+            total[0] = self._evict()
+
+    def file_path(self, name):
+        """Path of the file stored under ``name``; ValueError for a bad name"""
+        if not isinstance(name, str) or not _NAME.fullmatch(name):
+            raise ValueError(f'Invalid file name: {name!r}')
+        return os.path.join(self.path, name[:2], name + self.suffix)
+
+    def touch(self, name):
+        """Mark a file as recently used; returns whether it is stored"""
+        try:
+            path = self.file_path(name)
+            if self.ttl is not None and os.stat(path).st_mtime + self.ttl <= time.time():
+                self.remove(name)
+                return False
+            os.utime(path)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def write(self, name, *chunks):
+        """Store the concatenated ``chunks`` under ``name`` unless it is already
+        stored (then only touch it). Returns whether the file is stored."""
+        if self.touch(name):
+            return True  # already written, possibly by another process
+        size = sum(len(chunk) for chunk in chunks)
+        if size > self.max_bytes:
+            return False
+        try:
+            path = self.file_path(name)
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                with open(fd, 'wb') as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+                os.replace(tmp_path, path)
+            except OSError:
+                os.remove(tmp_path)  # e.g. a partial file after running out of space
+                raise
+            with self._locked_total() as total:
+                total[0] += size
+                if total[0] > self.max_bytes:
+                    # Trim well below the limit, so that a full directory is
+                    # not rescanned on every write
+                    total[0] = self._evict(max_bytes=self.max_bytes * 9 // 10)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def remove(self, name):
+        """Delete a file; returns whether it was stored"""
+        try:
+            path = self.file_path(name)
+            with self._locked_total() as total:
+                size = os.stat(path).st_size
+                os.remove(path)
+                total[0] -= size
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def clear(self):
+        """Delete every stored file"""
+        with self._locked_total() as total:
+            total[0] = self._evict(max_bytes=0)
+
+    @contextmanager
+    def _locked_total(self):
+        """Lock the directory against other processes while it changes.
+
+        Yields a one-item list holding the directory's total size in bytes
+        (recounted if unknown); the caller updates it and it is saved on exit.
+        """
+        fd = os.open(os.path.join(self.path, TOTAL_FILE), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)  # released when fd is closed
+            saved = os.read(fd, 32).strip()
+            total = [int(saved) if saved else sum(size for _mtime, _path, size in self._scan())]
+            yield total
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, str(total[0]).encode('ascii').ljust(32))
+        finally:
+            os.close(fd)
+
+    def _scan(self):
+        """(mtime, path, size) of every stored file, least recently used first"""
+        entries = []
+        for root, _dirs, files in os.walk(self.path):
+            for name in files:
+                if name.endswith(self.suffix):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue  # removed meanwhile
+                    entries.append((stat.st_mtime, path, stat.st_size))
+        entries.sort()
+        return entries
+
+    def _evict(self, max_bytes=None):
+        """Delete expired files, then the least recently used ones until the
+        directory fits in ``max_bytes`` (default: the size limit). Call with
+        the directory locked; returns its new total size."""
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = self._scan()
+        total = sum(size for _mtime, _path, size in entries)
+        expired = time.time() - self.ttl if self.ttl is not None else None
+        for mtime, path, size in entries:
+            if total <= max_bytes and (expired is None or mtime > expired):
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            total -= size
+        return total
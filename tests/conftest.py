@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Shared fixtures for the test suite
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def web_server(monkeypatch):
+    """The web_server module with an empty render cache and image store of its own.
+
+    Importing web_server sets up its stores from the environment, so the
+    variables that would make them create directories are cleared first; the
+    module's stores are put back after the test.
+    """
+    pytest.importorskip('flask')
+    monkeypatch.setenv('BRAILLEPIXEL_IMAGE_DIR', '')
+    monkeypatch.setenv('BRAILLEPIXEL_CACHE_DIR', '')
+    import web_server
+    from image_store import ImageStore
+    from render_cache import RenderCache
+    monkeypatch.setattr(web_server, 'render_cache', RenderCache())
+    monkeypatch.setattr(web_server, 'image_store', ImageStore())
+    return web_server
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the rendering fast paths
+Every engine, worker count, sweep, dither and threshold mode is compared with
+a straightforward reference (the original per-pixel algorithms, kept here) on
+the sample images, so the "identical output" guarantees cannot drift.
+
+    python -m pytest -q tests
+"""
+
+import io
+import json
+import os
+import sys
+
+import pytest
+from PIL import Image, ImageEnhance, ImageOps, ImageStat
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_DIR)
+import ascii_text
+import emoji_art
+import textart
+from dither import DITHER_MODES
+from thresholding import ADAPTIVE_MODES, adaptive_threshold, otsu_threshold
+
+SAMPLES = ['devil.jpeg', 'smiley.jpeg', 'logo.png', 'pictologo.png']
+ENGINES = ['python'] + (['numpy'] if textart.np is not None else [])
+THRESHOLDS = [0, 1, 60, 127, 128, 200, 255]
+
+
+def reference_braille(img, threshold=127, invert=False, auto=True):
+    """The original image_to_braille(): one cell and one pixel at a time.
+
+    With ``auto`` the threshold 127 means the auto-threshold, as it does there.
+    """
+    if img.mode != "L":
+        img = img.convert("L")
+    if auto and threshold == 127:
+        threshold = int(ImageStat.Stat(img).mean[0] * 0.85)
+    width, height = img.size
+    width -= width % 2
+    height -= height % 4
+    pixels = img.load()
+    lines = []
+    for y in range(0, height, 4):
+        line = []
+        for x in range(0, width, 2):
+            bits = 0
+            for dx, dy, dot in textart.DOT_MAPPING:
+                value = pixels[x + dx, y + dy]
+                if (value > threshold) if invert else (value < threshold):
+                    bits |= 1 << (dot - 1)
+            line.append(chr(0x2800 + bits))
+        lines.append("".join(line))
+    return "\n".join(lines)
+
+
+def reference_enhance(img):
+    """The original enhance_contrast(), built on ImageOps / ImageEnhance."""
+    stat = ImageStat.Stat(img)
+    if stat.stddev[0] < 20 or stat.mean[0] > 240 or stat.mean[0] < 15:
+        return ImageOps.equalize(img)
+    return ImageEnhance.Contrast(img).enhance(1.3)
+
+
+def reference_adaptive(img, block_size, offset):
+    """Dot mask of the "mean" mode from explicit (clipped) windows."""
+    width, height = img.size
+    pixels = img.load()
+    r = block_size // 2
+    mask = Image.new("L", img.size, 255)
+    for y in range(height):
+        for x in range(width):
+            window = [pixels[i, j]
+                      for j in range(max(0, y - r), min(height, y + r + 1))
+                      for i in range(max(0, x - r), min(width, x + r + 1))]
+            mean = (sum(window) + len(window) // 2) // len(window)
+            if pixels[x, y] < mean - offset:
+                mask.putpixel((x, y), 0)
+    return mask
+
+
+@pytest.fixture(scope='module', params=SAMPLES)
+def sample(request):
+    """A sample image at a 60-column cell grid, resized the original way."""
+    img = Image.open(os.path.join(REPO_DIR, request.param)).convert("L")
+    return textart.resize_to_cells(img, cols=60)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('invert', [False, True])
+def test_engines_match_reference(sample, engine, invert):
+    for threshold in THRESHOLDS:
+        assert textart.image_to_braille(sample, threshold, invert, engine=engine) == \
+            reference_braille(sample, threshold, invert)
+
+
+def test_odd_sizes_are_cropped_like_reference():
+    img = Image.effect_noise((37, 23), 64)
+    for engine in ENGINES:
+        assert textart.image_to_braille(img, 128, engine=engine) == reference_braille(img, 128)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_workers_match_single_process(sample, engine):
+    expected = reference_braille(sample)
+    assert textart.image_to_braille(sample, engine=engine, workers=2) == expected
+    assert textart.image_to_braille(sample, engine=engine, workers=3) == expected
+
+
+def test_workers_on_images_without_cells():
+    for size in [(1, 40), (40, 3), (1, 1)]:
+        img = Image.effect_noise(size, 64)
+        assert textart.image_to_braille(img, 128, workers=2) == textart.image_to_braille(img, 128)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('invert', [False, True])
+def test_sweep_matches_reference(sample, engine, invert):
+    sweep = textart.braille_threshold_sweep(sample, THRESHOLDS, invert, engine=engine)
+    assert list(sweep) == THRESHOLDS
+    for threshold, art in sweep.items():
+        assert art == reference_braille(sample, threshold, invert)
+
+
+def test_codes_round_trip(sample):
+    codes, cols, rows = textart.braille_codes(sample, 100)
+    art = textart.braille_from_codes(codes, cols, rows)
+    assert art == reference_braille(sample, 100)
+    assert textart.braille_to_codes(art) == (codes, cols, rows)
+
+
+@pytest.mark.parametrize('mode', DITHER_MODES[1:])
+@pytest.mark.parametrize('invert', [False, True])
+def test_dither_engines_agree(sample, mode, invert):
+    renders = {textart.image_to_braille(sample, 110, invert, engine=engine, dither=mode) for engine in ENGINES}
+    assert len(renders) == 1
+    sweep = textart.braille_threshold_sweep(sample, [110], invert, engine=ENGINES[-1], dither=mode)
+    assert sweep[110] in renders
+
+
+@pytest.mark.parametrize('invert', [False, True])
+def test_otsu_matches_reference(sample, invert):
+    threshold = otsu_threshold(sample)
+    # Dots go on the dark class ("pixel < t"), or on the light one when inverted
+    expected = reference_braille(sample, threshold - 1 if invert else threshold, invert, auto=False)
+    for engine in ENGINES:
+        assert textart.image_to_braille(sample, engine=engine, threshold_mode='otsu', invert=invert) == expected
+
+
+@pytest.mark.parametrize('mode', ADAPTIVE_MODES)
+@pytest.mark.parametrize('block_size', [3, 15, 63])
+def test_adaptive_engines_agree(sample, mode, block_size):
+    renders = {textart.image_to_braille(sample, engine=engine, threshold_mode=mode, block_size=block_size)
+               for engine in ENGINES}
+    assert len(renders) == 1
+
+
+def test_adaptive_mean_matches_reference():
+    img = Image.effect_noise((30, 20), 48)
+    expected = reference_adaptive(img, 5, 4)
+    for use_numpy in [False, True][:len(ENGINES)]:
+        assert adaptive_threshold(img, 'mean', 5, 4, use_numpy=use_numpy).tobytes() == expected.tobytes()
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('invert', [False, True])
+def test_enhance_matches_reference(sample, engine, invert):
+    enhanced = reference_enhance(sample)
+    assert textart.enhance_contrast(sample).tobytes() == enhanced.tobytes()
+    for threshold in (127, 140):
+        assert textart.image_to_braille(sample, threshold, invert, engine=engine, enhance=True) == \
+            reference_braille(enhanced, threshold, invert)
+    sweep = textart.braille_threshold_sweep(sample, [127, 140], invert, engine=engine, enhance=True)
+    assert sweep == {t: reference_braille(enhanced, t, invert) for t in (127, 140)}
+
+
+def test_iter_braille_rows_matches_resize(sample):
+    rows = list(textart.iter_braille_rows(sample, cols=40, threshold=120))
+    expected = textart.image_to_braille(textart.resize_to_cells(sample, cols=40), 120).split("\n")
+    assert len(rows) == len(expected)
+    differing = sum(a != b for row, ref in zip(rows, expected) for a, b in zip(row, ref))
+    # Strips are resampled on their own, so a few edge cells may round differently
+    assert differing <= len(expected) * len(expected[0]) // 50
+
+
+@pytest.mark.parametrize('threshold', [127, 120])
+@pytest.mark.parametrize('mode', ['P', '1'])
+def test_iter_braille_rows_palette_and_bilevel(tmp_path, threshold, mode):
+    img = Image.open(os.path.join(REPO_DIR, 'pictologo.png')).convert('RGB')
+    path = tmp_path / 'sample.gif'
+    (img.quantize(64) if mode == 'P' else img.convert('1')).save(path)
+    rows = list(textart.iter_braille_rows(str(path), cols=40, threshold=threshold))
+    expected = textart.image_to_braille(textart.resize_to_cells(textart.load_image(path), cols=40), threshold)
+    differing = sum(a != b for row, ref in zip(rows, expected.split("\n")) for a, b in zip(row, ref))
+    assert len(rows) == expected.count("\n") + 1
+    assert differing <= len(rows) * len(rows[0]) // 50
+
+
+def test_batch_matches_single_renders(web_server):
+    # Large enough that 40 and 400 columns get different JPEG draft scales
+    buffer = io.BytesIO()
+    Image.open(os.path.join(REPO_DIR, 'pictologo.png')).convert('RGB').resize((4000, 3000)).save(buffer, 'JPEG')
+    client = web_server.app.test_client()
+    variants = [{'cols': 40}, {'cols': 400}, {'cols': 120, 'threshold': 100}]
+    data = {'image': (io.BytesIO(buffer.getvalue()), 'big.jpg'), 'variants': json.dumps(variants)}
+    results = client.post('/api/batch', data=data).get_json()['results']
+    web_server.render_cache.clear()
+    for variant, item in zip(variants, results):
+        single = client.post('/api/braille', query_string=variant, data=buffer.getvalue(),
+                             headers={'Content-Type': 'image/jpeg'})
+        assert single.headers['X-Cache'] == 'MISS'
+        assert item['result'] == single.get_json()['result']
+
+
+def test_batch_output_clashes_are_found(tmp_path):
+    for name in ['x.jpeg', 'x.png', 'a/y.png', 'b/y.png', 'z.png']:
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_bytes(b'')
+    jobs = textart.expand_inputs([str(tmp_path / 'x.*'), str(tmp_path / '*/y.png'), str(tmp_path / 'z.png')])
+    clashes = textart.output_clashes(jobs, 'out')
+    assert sorted(clashes) == [os.path.join('out', 'x.txt'), os.path.join('out', 'y.txt')]
+    assert all(len(paths) == 2 for paths in clashes.values())
+
+
+@pytest.mark.parametrize('binary_mode', [False, True])
+def test_emoji_mosaic_matches_reference(sample, binary_mode):
+    emoji_list = emoji_art.EMOJI_SETS['faces'][:5]
+    levels = [emoji_list[i % len(emoji_list)] for i in range(16)]
+    pixels = sample.load()
+    expected = '\n'.join(
+        ''.join((('🔥' if pixels[x, y] >= 100.5 else '⚪') if binary_mode
+                 else levels[min(int(pixels[x, y] / 256 * 16), 15)]) for x in range(sample.width))
+        for y in range(sample.height))
+    assert emoji_art.image_to_emoji_mosaic(sample, emoji_list, binary_mode=binary_mode, threshold=100.5) == expected
+
+
+@pytest.mark.parametrize('font', sorted(ascii_text.FONTS))
+@pytest.mark.parametrize('spacing', [0, 1, 3])
+def test_ascii_text_matches_reference(font, spacing):
+    text = 'Hi, 42 ~'
+    font_data = ascii_text.FONTS[font]
+    height = len(next(iter(font_data.values())))
+    lines = []
+    for row in range(height):
+        line = ''
+        for char in text.upper():
+            line += font_data[char][row] if char in font_data else font_data.get(' ', ['   '] * height)[row]
+            if char != ' ':
+                line += ' ' * spacing
+        lines.append(line)
+    assert ascii_text.text_to_ascii_art(text, font, spacing) == '\n'.join(lines)
+
+
+def test_border_and_gradient_match_reference():
+    art = ascii_text.text_to_ascii_art('Braille', 'block')
+    lines = art.split('\n')
+    width = max(len(line) for line in lines)
+    edge = '*' * (width + 6)
+    assert ascii_text.create_border(art, '*', 2) == '\n'.join(
+        [edge] + ['*  ' + line.ljust(width) + '  *' for line in lines] + [edge])
+    chars = ' .:-=+*#%@'
+    assert ascii_text.create_gradient_text(art, chars) == '\n'.join(
+        ''.join(' ' if c == ' ' else chars[i % len(chars)] for i, c in enumerate(line)) for line in lines)
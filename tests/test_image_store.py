@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the image store's directory shared between server processes
+Two ImageStore instances on one directory stand in for two Gunicorn workers.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from image_store import ImageNotShared, ImageStore
+
+IMAGE_ID = 'ab' * 32
+
+
+def test_image_is_shared_between_stores(tmp_path):
+    first, second = ImageStore(shared_dir=tmp_path), ImageStore(shared_dir=tmp_path)
+    img = Image.effect_noise((37, 23), 64)
+    first.add(IMAGE_ID, img.convert('RGB'))
+    assert second.get(IMAGE_ID).tobytes() == img.tobytes()
+    half = second.resized(IMAGE_ID, 'half', lambda gray: gray.resize((18, 11)))
+    assert half.tobytes() == img.resize((18, 11)).tobytes()
+    assert second.discard(IMAGE_ID)
+    assert first.get(IMAGE_ID) is None and IMAGE_ID not in second
+
+
+def test_shared_images_expire_and_fit_the_budget(tmp_path):
+    store = ImageStore(ttl=60, max_bytes=1000, shared_dir=tmp_path)
+    for i in range(5):
+        store.add(f'{i:064x}', Image.new('L', (10, 30)))
+    assert ImageStore(max_bytes=1000, shared_dir=tmp_path).get(f'{4:064x}') is not None
+    assert sum(ImageStore(max_bytes=1000, shared_dir=tmp_path).get(f'{i:064x}') is not None
+               for i in range(5)) <= 3
+    path = os.path.join(tmp_path, IMAGE_ID[:2], IMAGE_ID + '.gray')
+    store.add(IMAGE_ID, Image.new('L', (10, 10)))
+    os.utime(path, (time.time() - 120, time.time() - 120))
+    assert ImageStore(ttl=60, shared_dir=tmp_path).get(IMAGE_ID) is None
+    assert not os.path.exists(path)
+
+
+def test_bad_ids_never_touch_the_directory(tmp_path):
+    store = ImageStore(shared_dir=tmp_path)
+    for image_id in ['../../etc/passwd', '', 42]:
+        assert store.get(image_id) is None and not store.discard(image_id)
+
+
+def test_refuses_directories_others_can_reach(tmp_path):
+    open_dir = tmp_path / 'open'
+    open_dir.mkdir(mode=0o755)
+    open_dir.chmod(0o755)
+    link = tmp_path / 'link'
+    private = tmp_path / 'private'
+    private.mkdir(mode=0o700)
+    link.symlink_to(private)
+    for path in (open_dir, link):
+        with pytest.raises(PermissionError):
+            ImageStore(shared_dir=str(path))
+    store = ImageStore(shared_dir=str(tmp_path / 'new'))
+    store.add(IMAGE_ID, Image.new('L', (4, 4)))
+    assert (tmp_path / 'new').stat().st_mode & 0o777 == 0o700
+    assert os.stat(os.path.join(tmp_path, 'new', IMAGE_ID[:2], IMAGE_ID + '.gray')).st_mode & 0o777 == 0o600
+
+
+def test_failed_shared_write_is_an_error(tmp_path, monkeypatch):
+    store = ImageStore(shared_dir=tmp_path)
+    monkeypatch.setattr(store._shared, 'write', lambda *args: False)
+    with pytest.raises(ImageNotShared):
+        store.add(IMAGE_ID, Image.new('L', (4, 4)))
+    assert store.get(IMAGE_ID) is None and len(store) == 0
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Tests for the web API's request handling (test_web_api.py in the repository
+root exercises a running server by hand)
+"""
+
+import io
+
+import pytest
+
+
+@pytest.fixture
+def client(web_server, monkeypatch):
+    monkeypatch.setitem(web_server.app.config, 'MAX_CONTENT_LENGTH', 1024)
+    return web_server.app.test_client()
+
+
+@pytest.mark.parametrize('path', ['/api/braille', '/api/emoji', '/api/images', '/api/async/braille',
+                                  '/api/braille/sweep', '/api/batch'])
+def test_oversized_bodies_get_413(client, path):
+    body = b'\xff' * 4096
+    responses = [client.post(path, data=b'{"image": "%s"}' % body, headers={'Content-Type': 'application/json'}),
+                 client.post(path, data={'image': (io.BytesIO(body), 'big.jpg')})]
+    if path != '/api/batch':  # takes no raw image bodies
+        responses.append(client.post(path, data=body, headers={'Content-Type': 'image/jpeg'}))
+    for response in responses:
+        assert response.status_code == 413
+        assert 'error' in response.get_json()
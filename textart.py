@@ -1,7 +1,25 @@
-from PIL import Image, ImageEnhance
+from PIL import Image
 import sys
 import os
 import argparse
+import glob
+import json
+import logging
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python engine is always available
+    np = None
+
+from dither import DITHER_MODES, dither as apply_dither
+from thresholding import ADAPTIVE_MODES, DEFAULT_BLOCK_SIZE, DEFAULT_OFFSET, THRESHOLD_MODES, adaptive_threshold
+from analysis import analyze, threshold_lut
+
+logger = logging.getLogger("braillepixel.textart")
 
 # Mapping 2x4 pixel blocks to a Braille character (Unicode 0x2800 base)
 # Dot numbering within a Braille cell:
@@ -11,25 +29,71 @@ import argparse
 # 7 8
 # Bits: (dot_number - 1) sets that bit.
 
-def image_to_braille(img, threshold=127, invert=False):
+# Rendering engines accepted by image_to_braille(engine=...)
+ENGINES = ("auto", "numpy", "python")
+
+# (dx, dy, dot_number) for every pixel of a 2x4 block
+DOT_MAPPING = (
+    (0, 0, 1), (0, 1, 2), (0, 2, 3), (0, 3, 7),
+    (1, 0, 4), (1, 1, 5), (1, 2, 6), (1, 3, 8),
+)
+
+# BRAILLE_GLYPHS[n] == chr(0x2800 + n) for every cell code 0-255. Being a
+# 256-character string it doubles as a str.translate table for code strings.
+BRAILLE_GLYPHS = "".join(chr(0x2800 + n) for n in range(256))
+
+# All glyphs live in U+2800-U+28FF, so in UTF-16-LE a glyph is its cell code
+# followed by 0x28 and whole rows can be built with byte slice assignments.
+_UTF16_BLANK = BRAILLE_GLYPHS[0].encode("utf-16-le")
+
+
+def resolve_engine(engine):
+    """Return the concrete engine name ("numpy" or "python") for ``engine``."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {', '.join(ENGINES)}")
+    if engine == "auto":
+        return "numpy" if np is not None else "python"
+    if engine == "numpy" and np is None:
+        raise ImportError("engine='numpy' requires NumPy to be installed")
+    return engine
+
+
+def image_to_braille(img, threshold=127, invert=False, engine="auto", workers=1, dither="none",
+                     threshold_mode="global", block_size=DEFAULT_BLOCK_SIZE, offset=DEFAULT_OFFSET,
+                     enhance=False):
     """Convert a grayscale PIL image to Braille art string.
 
     The image is sampled in 2x4 pixel blocks. Each block becomes one Braille character.
     Pixels darker than threshold are considered "on".
+
+    ``dither`` (one of DITHER_MODES) replaces the hard threshold with error
+    diffusion or ordered dithering centered on ``threshold`` (see dither.py);
+    with dithering the default threshold means mid-gray rather than auto.
+
+    ``threshold_mode`` (one of THRESHOLD_MODES) chooses where the threshold
+    comes from instead: "otsu" picks it from the histogram, "mean" and
+    "gaussian" compare each pixel with its ``block_size`` pixel neighborhood,
+    less ``offset`` (see thresholding.py). ``threshold`` is ignored then.
+
+    With ``enhance`` the image first gets enhance_contrast(); its lookup table
+    comes from the same histogram as the auto / Otsu threshold (see
+    analysis.py) and is merged with the threshold into one point operation.
+
+    ``engine`` selects the implementation: "numpy" thresholds and packs the whole
+    image as an array, "python" walks the cells one by one, and "auto" (default)
+    picks NumPy when it is installed. Both engines produce identical output.
+
+    With ``workers`` > 1 the image is split into horizontal bands of whole cell
+    rows that are rendered in parallel worker processes (see _braille_codes_parallel).
     """
+    engine = resolve_engine(engine)
+    check_modes(dither, threshold_mode)
+
     if img.mode != "L":
         img = img.convert("L")
 
-    # Get image statistics for auto-threshold
-    from PIL import ImageStat
-    stat = ImageStat.Stat(img)
-    mean_val = stat.mean[0]
-    auto_threshold = mean_val * 0.85  # Slightly below mean
-    
-    # Use auto-threshold if default threshold is used
-    if threshold == 127:
-        threshold = int(auto_threshold)
-        print(f"Debug - Auto threshold: {threshold} (from mean: {mean_val:.1f})", file=sys.stderr)
+    img, threshold, invert = _prepare_cells(img, threshold, invert, engine, dither, threshold_mode,
+                                            block_size, offset, enhance, auto=True)
 
     width, height = img.size
     # Ensure dimensions are multiples of 2 (width) and 4 (height) by cropping
@@ -38,74 +102,368 @@ def image_to_braille(img, threshold=127, invert=False):
     if (width, height) != img.size:
         img = img.crop((0, 0, width, height))
 
-    pixels = img.load()
-    
-    # Debug: Print some pixel values to understand the image
-    if width >= 10 and height >= 10:
+    # Debug: log some pixel values to understand the image (only sampled when
+    # debug logging is on, since this runs for every render)
+    if logger.isEnabledFor(logging.DEBUG) and width >= 10 and height >= 10:
+        pixels = img.load()
         sample_pixels = [pixels[x, y] for x in range(0, min(10, width), 2) for y in range(0, min(10, height), 2)]
-        print(f"Debug - Sample pixels: {sample_pixels[:10]}", file=sys.stderr)
-        print(f"Debug - Threshold: {threshold}, Min: {min(sample_pixels)}, Max: {max(sample_pixels)}", file=sys.stderr)
+        logger.debug("Sample pixels: %s", sample_pixels[:10])
+        logger.debug("Threshold: %s, Min: %s, Max: %s", threshold, min(sample_pixels), max(sample_pixels))
+
+    # Bands need at least two cell rows, and an image under 2 px wide has no
+    # cells at all (nothing to put in shared memory)
+    if workers > 1 and height // 4 > 1 and width >= 2:
+        codes = _braille_codes_parallel(img, threshold, invert, engine, workers)
+    else:
+        codes = _braille_codes(img, threshold, invert, engine)
+    return braille_from_codes(codes, width // 2, height // 4)
+
+
+def check_modes(dither, threshold_mode):
+    """Validate a dither / threshold_mode pair, raising ValueError."""
+    if dither not in DITHER_MODES:
+        raise ValueError(f"Unknown dither mode {dither!r}, expected one of {', '.join(DITHER_MODES)}")
+    if threshold_mode not in THRESHOLD_MODES:
+        raise ValueError(f"Unknown threshold mode {threshold_mode!r}, expected one of {', '.join(THRESHOLD_MODES)}")
+    if dither != "none" and threshold_mode != "global":
+        raise ValueError("threshold_mode cannot be combined with dither")
+
+
+def _prepare_cells(img, threshold, invert, engine, dither, threshold_mode, block_size, offset, enhance, auto):
+    """(image, threshold, invert) that _braille_codes() renders an "L" image with.
+
+    Applies the enhancement, dithering or threshold mode; with ``auto`` the
+    default threshold 127 becomes the auto-threshold. The image is analyzed
+    (one histogram pass) at most once.
+    """
+    lut = analysis = None
+    if enhance:
+        lut = analyze(img).enhance_lut()
+
+    if dither != "none" or threshold_mode in ADAPTIVE_MODES:
+        if lut:
+            img = img.point(lut)
+        if dither != "none":
+            return _dither_cells(img, dither, threshold, invert, engine)
+        mask = adaptive_threshold(img, threshold_mode, block_size, offset, invert, use_numpy=engine == "numpy")
+        return mask, 128, False
+
+    if threshold_mode == "otsu" or (auto and threshold == 127):
+        # Statistics of the enhanced image follow from the same histogram
+        analysis = analyze(img) if lut is None else analyze(img).remap(lut)
+        if threshold_mode == "otsu":
+            # Otsu's threshold t splits at "pixel < t"; inverted renders set dots
+            # on "pixel > threshold", which is the other class at t - 1
+            threshold = analysis.otsu - (1 if invert else 0)
+        else:
+            threshold = analysis.auto_threshold
+            logger.debug("Auto threshold: %d (from mean: %.1f)", threshold, analysis.mean)
+    if lut:
+        # Enhancement and threshold in one lookup: a ready-made dot mask
+        return img.point(threshold_lut(threshold, invert, lut)), 128, False
+    return img, threshold, invert
+
+
+def _dither_cells(img, mode, threshold, invert, engine):
+    """Dither an "L" image into a dot mask; returns (mask, threshold, invert) to render it with."""
+    if threshold == 127:
+        threshold = 128  # dithering is centered on mid-gray by default
+    return apply_dither(img, mode, threshold, invert, use_numpy=engine == "numpy"), 128, False
+
+
+def auto_threshold(img):
+    """The threshold image_to_braille() uses for the default 127: 85% of the mean."""
+    return analyze(img).auto_threshold
+
+
+def braille_codes(img, threshold, invert=False, engine="auto", dither="none",
+                  threshold_mode="global", block_size=DEFAULT_BLOCK_SIZE, offset=DEFAULT_OFFSET, enhance=False):
+    """Return (codes, cols, rows) for a PIL image at a literal threshold.
+
+    Like image_to_braille() but without the auto-threshold and without building
+    the string: the image is converted to grayscale, cropped to whole cells and
+    packed into row-major cell codes (one byte per cell).
+    """
+    engine = resolve_engine(engine)
+    check_modes(dither, threshold_mode)
+    if img.mode != "L":
+        img = img.convert("L")
+    img, threshold, invert = _prepare_cells(img, threshold, invert, engine, dither, threshold_mode,
+                                            block_size, offset, enhance, auto=False)
+    width, height = img.size
+    width -= width % 2
+    height -= height % 4
+    if (width, height) != img.size:
+        img = img.crop((0, 0, width, height))
+    return bytes(_braille_codes(img, threshold, invert, engine)), width // 2, height // 4
+
+
+def braille_row(codes):
+    """Return the Braille characters for a bytes-like sequence of cell codes."""
+    buf = bytearray(_UTF16_BLANK) * len(codes)
+    buf[0::2] = codes
+    return buf.decode("utf-16-le")
+
+
+def braille_from_codes(codes, cols, rows):
+    """Build Braille art from row-major cell codes (one byte per cell).
 
-    lines = []
+    The whole output is assembled as one UTF-16 buffer: a blank template with a
+    newline slot after every row, into which each row of codes is copied with a
+    single slice assignment. Decoding it is the only string-building step.
+    """
+    stride = 2 * (cols + 1)
+    buf = bytearray(_UTF16_BLANK) * (rows * (cols + 1))
+    buf[2 * cols::stride] = b"\n" * rows
+    buf[2 * cols + 1::stride] = bytes(rows)
+    for row in range(rows):
+        start = row * stride
+        buf[start:start + 2 * cols:2] = codes[row * cols:(row + 1) * cols]
+    return buf.decode("utf-16-le")[:-1]
+
+
+def braille_to_codes(art):
+    """Inverse of braille_from_codes(): return (codes, cols, rows) for Braille art."""
+    if not art:
+        return b"", 0, 0
+    lines = art.split("\n")
+    return "".join(lines).encode("utf-16-le")[0::2], len(lines[0]), len(lines)
+
+
+def _braille_codes(img, threshold, invert, engine):
+    """Row-major cell codes for a cropped "L" image using a resolved engine."""
+    if engine == "numpy":
+        return _braille_codes_numpy(img, threshold, invert)
+    width, height = img.size
+    return _braille_codes_python(img.load(), width, height, threshold, invert)
+
+
+def _braille_codes_parallel(img, threshold, invert, engine, workers):
+    """Cell codes for a cropped "L" image, rendered band by band in a process pool.
+
+    The pixels are copied once into a shared memory block; each worker attaches to
+    it by name and renders its band of whole cell rows, so the image itself is
+    never pickled. Bands are stitched back together in order.
+    """
+    width, height = img.size
+    rows = height // 4
+    bands = min(workers, rows)
+    shm = shared_memory.SharedMemory(create=True, size=width * height)
+    try:
+        shm.buf[:width * height] = img.tobytes()
+        bounds = [(4 * (rows * i // bands), 4 * (rows * (i + 1) // bands)) for i in range(bands)]
+        pool = _get_pool(workers)
+        futures = [pool.submit(_render_band, shm.name, width, y0, y1, threshold, invert, engine)
+                   for y0, y1 in bounds]
+        return b"".join(future.result() for future in futures)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _render_band(shm_name, width, y0, y1, threshold, invert, engine):
+    """Worker entry point: cell codes for pixel rows y0..y1 of a shared image."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        with shm.buf[y0 * width:y1 * width] as band_pixels:
+            band = Image.frombytes("L", (width, y1 - y0), band_pixels)
+        return bytes(_braille_codes(band, threshold, invert, engine))
+    finally:
+        shm.close()
+
+
+# Process pools are kept per worker count so repeated renders skip the start-up cost
+_POOLS = {}
+
+
+def _get_pool(workers):
+    pool = _POOLS.get(workers)
+    if pool is None:
+        pool = _POOLS[workers] = ProcessPoolExecutor(max_workers=workers)
+    return pool
+
+
+def _braille_codes_python(pixels, width, height, threshold, invert):
+    """Cell codes for a cropped image, computed one 2x4 block at a time."""
+    codes = bytearray((width // 2) * (height // 4))
+    i = 0
     for y in range(0, height, 4):
-        line_chars = []
         for x in range(0, width, 2):
             bits = 0
-            # (dx, dy, dot_number)
-            mapping = [
-                (0, 0, 1), (0, 1, 2), (0, 2, 3), (0, 3, 7),
-                (1, 0, 4), (1, 1, 5), (1, 2, 6), (1, 3, 8),
-            ]
-            for dx, dy, dot in mapping:
+            for dx, dy, dot in DOT_MAPPING:
                 pixel_val = pixels[x + dx, y + dy]
                 # Apply invert option or use threshold logic
                 if invert:
                     condition = pixel_val > threshold
                 else:
                     condition = pixel_val < threshold
-                
+
                 if condition:
                     bits |= 1 << (dot - 1)
-            line_chars.append(chr(0x2800 + bits))
-        lines.append("".join(line_chars))
-    return "\n".join(lines)
-
-def enhance_contrast(img):
-    """Enhance image contrast for better Braille conversion"""
-    from PIL import ImageOps, ImageStat
-    
-    # Check image statistics
-    stat = ImageStat.Stat(img)
-    mean_val = stat.mean[0]
-    stddev = stat.stddev[0] if hasattr(stat, 'stddev') else 0
-    
-    print(f"Debug - Image stats: mean={mean_val:.1f}, std={stddev:.1f}", file=sys.stderr)
-    
-    # If very low contrast or very light/dark, use equalization
-    if stddev < 20 or mean_val > 240 or mean_val < 15:
-        print("Debug - Using histogram equalization", file=sys.stderr)
-        return ImageOps.equalize(img)
-    
-    # Normal contrast enhancement for images with variation
-    enhancer = ImageEnhance.Contrast(img)
-    img = enhancer.enhance(1.3)  # Moderate contrast increase
-    
-    return img
+            codes[i] = bits
+            i += 1
+    return codes
+
+
+def _braille_codes_numpy(img, threshold, invert):
+    """Cell codes for a cropped "L" image, thresholded and packed as arrays."""
+    width, height = img.size
+    rows, cols = height // 4, width // 2
+
+    pixels = np.asarray(img, dtype=np.uint8)
+    on = (pixels > threshold) if invert else (pixels < threshold)
+    cells = on.view(np.uint8).reshape(rows, 4, cols, 2)
+
+    codes = np.zeros((rows, cols), dtype=np.uint8)
+    for dx, dy, dot in DOT_MAPPING:
+        codes |= cells[:, dy, :, dx] << (dot - 1)
+    return codes.tobytes()
+
+
+def braille_threshold_sweep(img, thresholds, invert=False, engine="auto", dither="none", enhance=False):
+    """Render a grayscale PIL image at every threshold in ``thresholds`` from one pass.
+
+    Returns a dict mapping each threshold (in the given order, duplicates
+    dropped) to the Braille art image_to_braille() gives for it, including
+    the automatic threshold that 127 selects.
+
+    Instead of thresholding the whole bitmap once per render, the pixels are
+    ordered by value once and each render only ORs in the dots that switch on
+    between it and the previous threshold (see _sweep_codes_numpy / _python).
+    A dithered image has no such shared structure, so with ``dither`` every
+    threshold is rendered on its own. With ``enhance`` the enhancement lookup
+    table is applied once up front.
+    """
+    engine = resolve_engine(engine)
+    if dither != "none":
+        return {t: image_to_braille(img, threshold=t, invert=invert, engine=engine, dither=dither, enhance=enhance)
+                for t in dict.fromkeys(thresholds)}
+
+    if img.mode != "L":
+        img = img.convert("L")
+
+    thresholds = list(dict.fromkeys(thresholds))
+    effective = {t: t for t in thresholds}
+    if enhance or 127 in effective:
+        analysis = analyze(img)
+        if enhance:
+            lut = analysis.enhance_lut()
+            img = img.point(lut)
+            analysis = analysis.remap(lut)
+        if 127 in effective:
+            effective[127] = analysis.auto_threshold
+
+    width, height = img.size
+    width -= width % 2
+    height -= height % 4
+    if (width, height) != img.size:
+        img = img.crop((0, 0, width, height))
+
+    # Inverted renders turn dots on for pixel > t; flipping both the pixel
+    # values and the thresholds reduces them to the pixel < t case.
+    if invert:
+        img = img.point(lambda v: 255 - v)
+        levels = {t: 255 - effective[t] for t in thresholds}
+    else:
+        levels = effective
+    ordered = sorted(set(levels.values()))
+
+    if engine == "numpy":
+        sweep = _sweep_codes_numpy(img, ordered)
+    else:
+        sweep = _sweep_codes_python(img, ordered)
+    codes = dict(zip(ordered, sweep))
+    cols, rows = width // 2, height // 4
+    return {t: braille_from_codes(codes[levels[t]], cols, rows) for t in thresholds}
+
+
+def _sweep_codes_numpy(img, levels):
+    """Cell codes for each of the ascending ``levels`` (dot on when pixel < level).
+
+    For every dot position the cells are sorted by that pixel's value once;
+    the cells whose dot switches on between two levels are then a contiguous
+    slice of that order, so each pixel is touched once over the whole sweep.
+    """
+    width, height = img.size
+    rows, cols = height // 4, width // 2
+    cells = np.asarray(img, dtype=np.uint8).reshape(rows, 4, cols, 2)
+
+    dots = []
+    for dx, dy, dot in DOT_MAPPING:
+        values = cells[:, dy, :, dx].ravel()
+        order = np.argsort(values, kind="stable")
+        bounds = np.searchsorted(values[order], np.asarray(levels), side="left")
+        dots.append((order, bounds, np.uint8(1 << (dot - 1))))
+
+    codes = np.zeros(rows * cols, dtype=np.uint8)
+    start = [0] * len(dots)
+    for i in range(len(levels)):
+        for d, (order, bounds, bit) in enumerate(dots):
+            codes[order[start[d]:bounds[i]]] |= bit
+            start[d] = bounds[i]
+        yield codes.tobytes()
+
+
+def _sweep_codes_python(img, levels):
+    """Pure-Python _sweep_codes_numpy: pixels bucketed by value in one pass."""
+    width, height = img.size
+    pixels = img.load()
+    buckets = [[] for _ in range(256)]
+    i = 0
+    for y in range(0, height, 4):
+        for x in range(0, width, 2):
+            for dx, dy, dot in DOT_MAPPING:
+                buckets[pixels[x + dx, y + dy]].append((i, 1 << (dot - 1)))
+            i += 1
+
+    codes = bytearray(i)
+    value = 0
+    for level in levels:
+        while value < min(level, 256):
+            for cell, bit in buckets[value]:
+                codes[cell] |= bit
+            value += 1
+        yield bytes(codes)
+
+
+def enhance_contrast(img, analysis=None):
+    """Enhance image contrast for better Braille conversion
+
+    Very flat or very light/dark images are equalized (ImageOps.equalize),
+    others get a moderate contrast increase (ImageEnhance.Contrast, 1.3).
+    Both are one lookup table built from ``analysis`` (analyze(img) if not
+    given), so the image is read only once more, to apply it.
+    """
+    if img.mode != "L":
+        img = img.convert("L")
+    analysis = analysis or analyze(img)
+
+    logger.debug("Image stats: mean=%.1f, std=%.1f", analysis.mean, analysis.stddev)
+    if analysis.low_contrast:
+        logger.debug("Using histogram equalization")
+
+    return img.point(analysis.enhance_lut())
 
 
 def load_image(path):
     return Image.open(path).convert("L")
 
 
-def resize_to_cells(img, cols=None, rows=None, max_cols=None):
-    """Resize image to target number of Braille cells (cols x rows).
+# Minimum ratio between the decoded size and the target size when fit_to_cells()
+# decodes at reduced scale; 3 keeps the final LANCZOS pass visually lossless.
+DECODE_GAP = 3
+
+
+def target_size(size, cols=None, rows=None, max_cols=None):
+    """Return the (width, height) resize_to_cells() produces for an image of ``size``.
 
     Each Braille cell = 2(width) x 4(height) pixels. We preserve aspect ratio.
     Priority:
       - If cols or rows provided, scale to fit inside both (like "contain").
-      - If neither provided but max_cols provided, shrink only if wider.
+      - If neither provided but max_cols provided, shrink only if wider
+        (an image that already fits keeps its original size).
     """
-    w, h = img.size
+    w, h = size
     width_cells = w / 2
     height_cells = h / 4
 
@@ -119,7 +477,7 @@ def resize_to_cells(img, cols=None, rows=None, max_cols=None):
         scale = min(scale_factors)
     elif max_cols:
         if width_cells <= max_cols:
-            return img
+            return size
         scale = max_cols / width_cells
     else:
         # Default max size to prevent huge output
@@ -131,8 +489,144 @@ def resize_to_cells(img, cols=None, rows=None, max_cols=None):
     # Adjust to required multiples and ensure minimum size
     new_w = max(2, new_w - (new_w % 2))
     new_h = max(4, new_h - (new_h % 4))
-    
-    return img.resize((new_w, new_h), Image.LANCZOS)
+
+    return new_w, new_h
+
+
+def resize_to_cells(img, cols=None, rows=None, max_cols=None):
+    """Resize image to target number of Braille cells (cols x rows).
+
+    See target_size() for how the cell grid is chosen.
+    """
+    size = target_size(img.size, cols=cols, rows=rows, max_cols=max_cols)
+    if size == img.size:
+        return img
+    return img.resize(size, Image.LANCZOS)
+
+
+def fit_to_cells(img, cols=None, rows=None, max_cols=None, mode=None):
+    """Resize a freshly opened image to its Braille cell grid, decoding as little as possible.
+
+    Equivalent to resize_to_cells(img.convert(mode)), but the target size is
+    computed from the header first so the decoder can work at a reduced scale:
+    JPEGs use draft mode (1/2, 1/4 or 1/8 scale, straight to ``mode``) and other
+    formats are shrunk with Image.reduce() before the final LANCZOS resample.
+    Both keep at least DECODE_GAP times the target size, so the result is
+    indistinguishable from a full-resolution resize.
+    """
+    grid = (cols, rows, max_cols)
+    return fit_to_grids(img, [grid], mode=mode)[grid]
+
+
+def fit_to_grids(img, grids, mode=None):
+    """fit_to_cells() for several (cols, rows, max_cols) grids with a single decode.
+
+    The image is decoded once, at the reduced scale suitable for the largest
+    target, and resized once per distinct target size. Returns a dict mapping
+    each grid to its resized image (grids with the same size share one image).
+    """
+    return resize_to_grids(*decode_for_grids(img, grids, mode=mode))
+
+
+def decode_for_grids(img, grids, mode=None):
+    """First step of fit_to_grids(): decode a freshly opened image.
+
+    Returns (decoded image, sizes), where ``sizes`` maps each grid to its
+    target size, computed from the original size (a draft decode changes
+    ``img.size``). Pass both to resize_to_grids().
+    """
+    sizes = draft_for_grids(img, grids, mode)
+    if mode and img.mode != mode:
+        img = img.convert(mode)
+    img.load()
+    return img, sizes
+
+
+def draft_for_grids(img, grids, mode=None):
+    """Set up the reduced-scale decode of decode_for_grids() without decoding.
+
+    Afterwards ``img.size`` is the size the image will be decoded at. Returns
+    the target size of each grid, as decode_for_grids() does.
+    """
+    sizes = {grid: target_size(img.size, *grid) for grid in grids}
+    largest = max(sizes.values(), key=lambda size: size[0] * size[1])
+    if largest != img.size:
+        img.draft(mode or img.mode, (largest[0] * DECODE_GAP, largest[1] * DECODE_GAP))
+    return sizes
+
+
+def resize_to_grids(img, sizes):
+    """Second step of fit_to_grids(): resize once per distinct target size."""
+    resized = {}
+    for size in set(sizes.values()):
+        resized[size] = img if size == img.size else img.resize(size, Image.LANCZOS, reducing_gap=DECODE_GAP)
+    return {grid: resized[size] for grid, size in sizes.items()}
+
+
+def iter_braille_rows(img_or_path, cols=None, rows=None, max_cols=None,
+                      threshold=127, invert=False, engine="auto", threshold_mode="global", enhance=False):
+    """Yield Braille art one line at a time for very large images.
+
+    ``img_or_path`` is a PIL image, a path or a file object. The image is resized
+    to the same cell grid as resize_to_cells(), but one 4-pixel strip at a time,
+    and each strip is converted to grayscale, thresholded and yielded as soon as
+    it is done, so only one strip of the output bitmap is ever held in memory.
+    JPEG sources are decoded straight to grayscale at a reduced scale (see
+    fit_to_cells()).
+
+    Lines match image_to_braille(resize_to_cells(img)) up to resampling rounding
+    at strip edges. With the default threshold the auto-threshold is estimated
+    from a reduced preview of the source instead of the full resized image, and
+    so are Otsu's threshold for ``threshold_mode="otsu"`` and the ``enhance``
+    lookup table. The adaptive modes need neighboring strips and raise ValueError.
+    """
+    engine = resolve_engine(engine)
+    check_modes("none", threshold_mode)
+    if threshold_mode in ADAPTIVE_MODES:
+        raise ValueError(f"threshold_mode={threshold_mode!r} cannot be rendered strip by strip")
+    img = img_or_path if isinstance(img_or_path, Image.Image) else Image.open(img_or_path)
+    new_w, new_h = target_size(img.size, cols=cols, rows=rows, max_cols=max_cols)
+    resize = (new_w, new_h) != img.size
+    img.draft("L", (new_w * DECODE_GAP, new_h * DECODE_GAP) if resize else img.size)
+    if img.mode in ("1", "P", "PA"):
+        # Palette and bilevel images (most GIFs) cannot be reduce()d, and
+        # resize() silently falls back to NEAREST for them; their "L" version
+        # is no larger and is what load_image() renders anyway
+        img = img.convert("L")
+
+    src_w, src_h = img.size
+    new_w -= new_w % 2
+
+    lut = None
+    if threshold == 127 or threshold_mode == "otsu" or enhance:
+        factor = max(1, min(src_w // new_w, src_h // max(new_h, 1)))
+        preview = img.reduce(factor) if factor > 1 else img
+        if preview.mode != "L":
+            preview = preview.convert("L")
+        analysis = analyze(preview)
+        if enhance:
+            lut = analysis.enhance_lut()
+            analysis = analysis.remap(lut)
+        if threshold_mode == "otsu":
+            threshold = analysis.otsu - (1 if invert else 0)  # see _prepare_cells()
+        elif threshold == 127:
+            threshold = analysis.auto_threshold
+            logger.debug("Auto threshold: %d (from mean: %.1f)", threshold, analysis.mean)
+        if lut:
+            lut, threshold, invert = threshold_lut(threshold, invert, lut), 128, False
+
+    scale_y = src_h / new_h if new_h else 1
+    for y in range(0, new_h - 3, 4):
+        if not resize:
+            strip = img.crop((0, y, new_w, y + 4))
+        else:
+            box = (0, y * scale_y, src_w, (y + 4) * scale_y)
+            strip = img.resize((new_w, 4), Image.LANCZOS, box=box)
+        if strip.mode != "L":
+            strip = strip.convert("L")
+        if lut:
+            strip = strip.point(lut)
+        yield braille_row(_braille_codes(strip, threshold, invert, engine))
 
 
 # Keep old helper for backward compatibility (now delegates)
@@ -141,33 +635,290 @@ def auto_resize(img, max_cols=120):
     return resize_to_cells(img, max_cols=max_cols)
 
 
+def expand_inputs(inputs):
+    """Expand batch inputs into (path, output_name) pairs.
+
+    Each input is a file, a directory (searched recursively for files Pillow can
+    open, by extension) or a glob pattern. "-" reads one path per line from stdin.
+    Output names keep the path relative to a directory input so files with the
+    same name in different folders do not collide.
+    """
+    extensions = set(Image.registered_extensions())
+    pairs = []
+    for item in inputs:
+        if item == "-":
+            pairs.extend((line.strip(), os.path.basename(line.strip())) for line in sys.stdin if line.strip())
+        elif os.path.isdir(item):
+            for root, _dirs, files in os.walk(item):
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in extensions:
+                        path = os.path.join(root, name)
+                        pairs.append((path, os.path.relpath(path, item)))
+        elif any(c in item for c in "*?["):
+            pairs.extend((path, os.path.basename(path)) for path in sorted(glob.glob(item, recursive=True))
+                         if os.path.isfile(path))
+        else:
+            pairs.append((item, os.path.basename(item)))
+    return pairs
+
+
+def batch_output_path(output_dir, name):
+    """Where a --batch run with --output-dir writes the art for ``name``."""
+    return os.path.join(output_dir, os.path.splitext(name)[0] + ".txt")
+
+
+def output_clashes(jobs, output_dir):
+    """{output path: [input paths]} for outputs that several inputs would write."""
+    targets = {}
+    for path, name in jobs:
+        targets.setdefault(batch_output_path(output_dir, name), []).append(path)
+    return {target: paths for target, paths in targets.items() if len(paths) > 1}
+
+
+def render_file(job):
+    """Batch worker: render one (path, output_name, options) job to a result record.
+
+    Errors are caught and reported in the record so one bad file never stops a
+    batch. When options["output_dir"] is set the art is written there as
+    <output_name>.txt, otherwise it is returned in the record.
+    """
+    path, name, options = job
+    start = time.perf_counter()
+    record = {"path": path}
+    try:
+        img = fit_to_cells(Image.open(path), cols=options["cols"], rows=options["rows"],
+                           max_cols=options["max_cols"], mode="L")
+        art = image_to_braille(img, threshold=options["threshold"], invert=options["invert"],
+                               engine=options["engine"], dither=options["dither"],
+                               threshold_mode=options["threshold_mode"], block_size=options["block_size"],
+                               offset=options["offset"], enhance=options["enhance"])
+        if options["output_dir"]:
+            out_path = batch_output_path(options["output_dir"], name)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            with open(out_path, "w", encoding="utf-8") as f:
+                f.write(art + "\n")
+            record["output"] = out_path
+        else:
+            record["result"] = art
+    except Exception as e:
+        record["error"] = str(e)
+    record["seconds"] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def run_batch(args):
+    """Convert every input of a --batch run, returning the number of failures.
+
+    With --output-dir, inputs that would write the same file (x.jpg and x.png,
+    or globbed files with the same name) stop the run before anything is
+    converted, rather than silently overwriting each other.
+    """
+    jobs = expand_inputs(args.image)
+    if args.output_dir:
+        clashes = output_clashes(jobs, args.output_dir)
+        for target, paths in clashes.items():
+            print(f"{', '.join(paths)} would all be written to {target}", file=sys.stderr)
+        if clashes:
+            print("Nothing converted: rename these inputs or convert them in separate runs", file=sys.stderr)
+            return sum(len(paths) for paths in clashes.values())
+    options = {
+        "cols": args.cols, "rows": args.rows, "max_cols": args.max_cols,
+        "threshold": args.threshold, "invert": args.invert, "engine": args.engine,
+        "dither": args.dither, "threshold_mode": args.threshold_mode, "block_size": args.block_size,
+        "offset": args.offset, "enhance": args.enhance, "output_dir": args.output_dir,
+    }
+    jsonl = None
+    if args.jsonl == "-" or (args.jsonl is None and not args.output_dir):
+        jsonl = sys.stdout
+    elif args.jsonl:
+        jsonl = open(args.jsonl, "w", encoding="utf-8")
+
+    failures = 0
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers or os.cpu_count()) as pool:
+            for record in pool.map(render_file, [(path, name, options) for path, name in jobs], chunksize=8):
+                if "error" in record:
+                    failures += 1
+                    print(f"Failed to convert {record['path']}: {record['error']}", file=sys.stderr)
+                if jsonl:
+                    jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    jsonl.flush()
+    finally:
+        if jsonl not in (None, sys.stdout):
+            jsonl.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Converted {len(jobs) - failures}/{len(jobs)} images in {elapsed:.2f}s", file=sys.stderr)
+    return failures
+
+
+def frame_size(value):
+    """argparse type for --raw-stream: "WIDTHxHEIGHT" -> (width, height)."""
+    try:
+        width, height = (int(n) for n in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value!r}")
+    if width < 2 or height < 4:
+        raise argparse.ArgumentTypeError("frames must be at least 2x4 pixels")
+    return width, height
+
+
+def read_frame(stream, view):
+    """Fill the writable buffer ``view`` from a binary stream; False at end of input."""
+    filled = 0
+    while filled < len(view):
+        n = stream.readinto(view[filled:])
+        if not n:
+            return False  # end of input (a trailing partial frame is dropped)
+        filled += n
+    return True
+
+
+def run_raw_stream(args):
+    """Render raw 8-bit grayscale frames from stdin as a live terminal view.
+
+    Frames are read into one reused buffer that a PIL image wraps without
+    copying. The target size and, for the default threshold, the auto-threshold
+    of the first frame are computed once. Only cells that changed since the
+    previous frame are redrawn (see animation.TerminalPlayer).
+    """
+    from animation import TerminalPlayer
+
+    width, height = args.raw_stream
+    cols, rows = args.cols, args.rows
+    if cols is None and rows is None and args.max_cols is None:
+        terminal = shutil.get_terminal_size()
+        cols, rows = terminal.columns, terminal.lines - (2 if args.stats else 1)
+    new_w, new_h = target_size((width, height), cols=cols, rows=rows, max_cols=args.max_cols)
+    size = (new_w - new_w % 2, new_h)
+    engine = resolve_engine(args.engine)
+
+    buf = bytearray(width * height)
+    view = memoryview(buf)
+    frame = Image.frombuffer("L", (width, height), buf, "raw", "L", 0, 1)
+    stream = sys.stdin.buffer
+    threshold = args.threshold
+
+    frames = 0
+    start = window_start = time.perf_counter()
+    window_frames = 0
+    render_time = 0.0
+    player = TerminalPlayer(size[0] // 2, size[1] // 4)
+    with player:
+        while read_frame(stream, view):
+            render_start = time.perf_counter()
+            small = frame if size == frame.size else frame.resize(size, Image.LANCZOS, reducing_gap=DECODE_GAP)
+            if frames == 0 and threshold == 127 and args.dither == "none" and args.threshold_mode == "global":
+                analysis = analyze(small)
+                if args.enhance:
+                    analysis = analysis.remap(analysis.enhance_lut())
+                threshold = analysis.auto_threshold
+            player.show(braille_codes(small, threshold, invert=args.invert, engine=engine, dither=args.dither,
+                                      threshold_mode=args.threshold_mode, block_size=args.block_size,
+                                      offset=args.offset, enhance=args.enhance)[0])
+            now = time.perf_counter()
+            render_time += now - render_start
+            frames += 1
+            window_frames += 1
+
+            if args.stats and now - window_start >= 0.5:
+                fps = window_frames / (now - window_start)
+                player.out.write(f"\x1b[{player.rows + 1};1H{fps:5.1f} fps | frame {frames} | "
+                                 f"render {render_time / frames * 1000:.1f} ms/frame\x1b[K")
+                player.out.flush()
+                window_start, window_frames = now, 0
+
+    if args.stats and frames:
+        elapsed = time.perf_counter() - start
+        print(f"Rendered {frames} frames at {player.cols}x{player.rows} cells in {elapsed:.2f}s "
+              f"({frames / elapsed:.1f} fps, render {render_time / frames * 1000:.1f} ms/frame)", file=sys.stderr)
+
+
 def parse_args():
     p = argparse.ArgumentParser(description="Convert image to Unicode Braille art")
-    p.add_argument("image", nargs="?", default="/home/hari/Documents/pyart/vj.jpg", help="Image path")
+    p.add_argument("image", nargs="*", default=["/home/hari/Documents/pyart/vj.jpg"],
+                   help="Image path (with --batch: files, directories, globs or - for a list on stdin)")
     p.add_argument("--cols", type=int, help="Target number of Braille columns (width)")
     p.add_argument("--rows", type=int, help="Target number of Braille rows (height)")
     p.add_argument("--max-cols", type=int, default=None, help="Maximum columns (shrink only if wider)")
     p.add_argument("--threshold", type=int, default=127, help="Grayscale threshold 0-255 (lower = lighter)")
     p.add_argument("--invert", action="store_true", help="Invert colors (light on dark)")
+    p.add_argument("--stream", action="store_true", help="Render strip by strip and write each line as soon as it is ready")
+    p.add_argument("--workers", type=int, default=None,
+                   help="Render horizontal bands in N worker processes (with --batch: images in parallel, default: all CPUs)")
+    p.add_argument("--batch", action="store_true", help="Convert many images in one run")
+    p.add_argument("--output-dir", help="With --batch, write each result to OUTPUT_DIR/<name>.txt")
+    p.add_argument("--jsonl", help="With --batch, write JSON-lines records to this file (- for stdout, the default)")
+    p.add_argument("--engine", choices=ENGINES, default="auto", help="Rendering engine (auto uses NumPy when installed)")
+    p.add_argument("--dither", choices=DITHER_MODES, default="none",
+                   help="Dither instead of a hard threshold (the threshold becomes the dither midpoint)")
+    p.add_argument("--threshold-mode", choices=THRESHOLD_MODES, default="global",
+                   help="otsu: threshold from the histogram; mean/gaussian: per pixel from its neighborhood")
+    p.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE,
+                   help="With --threshold-mode mean/gaussian, the neighborhood size in pixels (odd)")
+    p.add_argument("--offset", type=int, default=DEFAULT_OFFSET,
+                   help="With --threshold-mode mean/gaussian, how much darker than its neighborhood a dot must be")
+    p.add_argument("--enhance", action="store_true",
+                   help="Boost contrast first (histogram equalization for flat images)")
+    p.add_argument("--raw-stream", type=frame_size, metavar="WIDTHxHEIGHT",
+                   help="Read raw 8-bit grayscale frames of this size from stdin and show them live")
+    p.add_argument("--stats", action="store_true", help="With --raw-stream, show a frames-per-second counter")
+    p.add_argument("-v", "--verbose", action="store_true",
+                   help="Log debug details (thresholds, pixel samples) to stderr; same as BRAILLEPIXEL_LOG_LEVEL=DEBUG")
     return p.parse_args()
 
 
 def main():
     args = parse_args()
-    image_path = args.image
+    level = logging.DEBUG if args.verbose else os.environ.get("BRAILLEPIXEL_LOG_LEVEL", "WARNING").upper()
+    logging.basicConfig(level=level, format="%(levelname)s %(name)s: %(message)s")
+    if args.dither != "none" and args.threshold_mode != "global":
+        print("--dither cannot be combined with --threshold-mode")
+        sys.exit(1)
+    if args.batch:
+        sys.exit(1 if run_batch(args) else 0)
+    if args.raw_stream:
+        try:
+            run_raw_stream(args)
+        except KeyboardInterrupt:
+            pass
+        return
+    image_path = args.image[0]
 
     if not os.path.isfile(image_path):
         print(f"Image not found: {image_path}")
         sys.exit(1)
 
+    if args.stream:
+        if args.dither != "none":
+            print("--dither cannot be combined with --stream")
+            sys.exit(1)
+        if args.threshold_mode in ADAPTIVE_MODES:
+            print(f"--threshold-mode {args.threshold_mode} cannot be combined with --stream")
+            sys.exit(1)
+        try:
+            lines = iter_braille_rows(image_path, cols=args.cols, rows=args.rows, max_cols=args.max_cols,
+                                      threshold=args.threshold, invert=args.invert, engine=args.engine,
+                                      threshold_mode=args.threshold_mode, enhance=args.enhance)
+            for line in lines:
+                sys.stdout.write(line + "\n")
+                sys.stdout.flush()
+        except Exception as e:
+            print(f"Failed to render image: {e}")
+            sys.exit(1)
+        return
+
     try:
-        img = load_image(image_path)
+        img = fit_to_cells(Image.open(image_path), cols=args.cols, rows=args.rows, max_cols=args.max_cols,
+                           mode="L")
     except Exception as e:
         print(f"Failed to open image: {e}")
         sys.exit(1)
 
-    img = resize_to_cells(img, cols=args.cols, rows=args.rows, max_cols=args.max_cols)
-    art = image_to_braille(img, threshold=args.threshold, invert=args.invert)
+    art = image_to_braille(img, threshold=args.threshold, invert=args.invert, engine=args.engine,
+                           workers=args.workers or 1, dither=args.dither, threshold_mode=args.threshold_mode,
+                           block_size=args.block_size, offset=args.offset, enhance=args.enhance)
     print(art)
 
 
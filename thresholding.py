@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Threshold selection for Braille art
+Otsu's method picks one global threshold from the histogram; the adaptive
+modes compare every pixel with the mean (or a Gaussian-weighted mean) of the
+window around it, so unevenly lit images keep detail in both the bright and
+the dark parts.
+"""
+
+from itertools import accumulate
+
+from PIL import Image
+
+from analysis import analyze
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the adaptive modes have a pure-Python path
+    np = None
+
+# Threshold modes accepted by image_to_braille(threshold_mode=...). "global"
+# is the plain threshold (or the auto-threshold for the default 127).
+THRESHOLD_MODES = ("global", "otsu", "mean", "gaussian")
+
+# Adaptive modes: thresholds that vary across the image
+ADAPTIVE_MODES = ("mean", "gaussian")
+
+DEFAULT_BLOCK_SIZE = 15
+DEFAULT_OFFSET = 8
+
+
+def otsu_threshold(img):
+    """Otsu's threshold for a grayscale "L" image.
+
+    Returns the threshold t for which "pixel < t" splits the histogram into
+    the two classes with the largest between-class variance (see
+    analysis.ImageAnalysis.otsu).
+    """
+    return analyze(img).otsu
+
+
+def gaussian_radius(block_size):
+    """Radius of the box filter that, applied three times, approximates the
+    Gaussian window of ``block_size`` (OpenCV's sigma for that kernel size)."""
+    sigma = 0.3 * ((block_size - 1) * 0.5 - 1) + 0.8
+    # Three boxes of width 2r + 1 have a combined variance of r * (r + 1)
+    return max(1, round(((1 + 4 * sigma * sigma) ** 0.5 - 1) / 2))
+
+
+def adaptive_threshold(img, mode, block_size=DEFAULT_BLOCK_SIZE, offset=DEFAULT_OFFSET,
+                       invert=False, use_numpy=None):
+    """Threshold a grayscale "L" image against its local mean.
+
+    Returns an "L" image of the same size that is 0 where a dot should be set
+    and 255 elsewhere: pixels more than ``offset`` darker than the (rounded)
+    mean of the ``block_size`` x ``block_size`` window centered on them
+    (lighter, with ``invert``). "gaussian" weights the window with three
+    passes of a box filter instead. Windows are clipped at the image edges.
+
+    Window sums come from a summed-area table, so the cost does not depend on
+    ``block_size``. ``use_numpy`` picks the NumPy path (default: when NumPy is
+    installed); both paths give identical masks.
+    """
+    if mode not in ADAPTIVE_MODES:
+        raise ValueError(f"Unknown adaptive threshold mode {mode!r}, expected one of {', '.join(ADAPTIVE_MODES)}")
+    if block_size < 3 or block_size % 2 == 0:
+        raise ValueError(f"block_size must be an odd number of at least 3, got {block_size}")
+    if use_numpy is None:
+        use_numpy = np is not None
+    if img.mode != "L":
+        img = img.convert("L")
+    # As in dither(): inverted art sets dots on light pixels, so flip the
+    # values and only handle "dot where darker than the local mean"
+    if invert:
+        img = img.point(lambda v: 255 - v)
+
+    if mode == "mean":
+        radius, passes = block_size // 2, 1
+    else:
+        radius, passes = gaussian_radius(block_size), 3
+    if use_numpy:
+        return _adaptive_numpy(img, radius, passes, offset)
+    return _adaptive_python(img, radius, passes, offset)
+
+
+def _window_bounds(length, radius):
+    """(start, stop) index of the window around every position, clipped to 0..length."""
+    return ([max(0, i - radius) for i in range(length)],
+            [min(length, i + radius + 1) for i in range(length)])
+
+
+def _adaptive_numpy(img, radius, passes, offset):
+    """Local means from a summed-area table built with two cumulative sums."""
+    width, height = img.size
+    # The table's largest entry is the sum of all pixels
+    dtype = np.int32 if 255 * width * height < 2 ** 31 else np.int64
+    pixels = np.asarray(img, dtype=dtype)
+    x0, x1 = (np.array(b) for b in _window_bounds(width, radius))
+    y0, y1 = (np.array(b) for b in _window_bounds(height, radius))
+    counts = (y1 - y0)[:, None] * (x1 - x0)[None, :]
+
+    means = pixels
+    table = np.zeros((height + 1, width + 1), dtype=dtype)
+    for _ in range(passes):
+        np.cumsum(means, axis=0, out=table[1:, 1:])
+        np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+        # Window sums: differences of table rows, then of their columns
+        rows = table.take(y1, axis=0) - table.take(y0, axis=0)
+        sums = rows.take(x1, axis=1) - rows.take(x0, axis=1)
+        means = (sums + counts // 2) // counts
+
+    mask = np.where(pixels < means - offset, 0, 255).astype(np.uint8)
+    return Image.fromarray(mask, "L")
+
+
+def _adaptive_python(img, radius, passes, offset):
+    """Pure-Python _adaptive_numpy: the summed-area table is built as running
+    sums along each row and then down the columns."""
+    width, height = img.size
+    data = img.tobytes()
+    pixels = [list(data[y * width:(y + 1) * width]) for y in range(height)]
+    x_bounds = list(zip(*_window_bounds(width, radius)))
+    y_bounds = list(zip(*_window_bounds(height, radius)))
+    x_counts = [x1 - x0 for x0, x1 in x_bounds]
+
+    means = pixels
+    for _ in range(passes):
+        # Window sums along each row, then prefix sums of those down the columns
+        table = [[0] * width]
+        for row in means:
+            prefix = [0, *accumulate(row)]
+            sums = [prefix[x1] - prefix[x0] for x0, x1 in x_bounds]
+            table.append([above + s for above, s in zip(table[-1], sums)])
+        means = []
+        for y0, y1 in y_bounds:
+            y_count = y1 - y0
+            means.append([(bottom - top + count // 2) // count
+                          for bottom, top, count in zip(table[y1], table[y0], (y_count * c for c in x_counts))])
+
+    mask = bytearray(width * height)
+    for y, (row, mean_row) in enumerate(zip(pixels, means)):
+        mask[y * width:(y + 1) * width] = bytes(0 if p < m - offset else 255 for p, m in zip(row, mean_row))
+    return Image.frombytes("L", (width, height), bytes(mask))
@@ -4,22 +4,539 @@ Flask backend API for BraillePixel web interface
 Handles actual image processing and art generation
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
 from PIL import Image, ImageFont, ImageDraw
 import io
+import asyncio
+import itertools
 import base64
+import json
+import logging
+import threading
 import sys
 import os
 
 # Import our existing modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from textart import image_to_braille, resize_to_cells
-from emoji_art import image_to_emoji_mosaic, text_to_emoji_art, EMOJI_SETS, resize_image
+from textart import (image_to_braille, braille_threshold_sweep, braille_to_codes, decode_for_grids,
+                     draft_for_grids, iter_braille_rows, resize_to_grids)
+from emoji_art import image_to_emoji_mosaic, text_to_emoji_art, get_font, EMOJI_SETS, resize_image
 from ascii_text import text_to_ascii_art, create_border, create_gradient_text
+from render_cache import RenderCache, hash_image, make_key
+from render_pool import RenderPool, PoolSaturated, host_pool, render_braille_job, render_emoji_job
+from image_store import ImageNotShared, ImageStore, ImageTooLarge
+from thresholding import ADAPTIVE_MODES, DEFAULT_BLOCK_SIZE, DEFAULT_OFFSET
+from compression import COMPRESSIBLE_TYPES, compress, compress_stream, negotiate
+from request_timing import RequestTimer, timing_logger_from_env
+
+logging.basicConfig(
+    level=os.environ.get('BRAILLEPIXEL_LOG_LEVEL', 'WARNING').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s',
+)
+logger = logging.getLogger('braillepixel.web')
+# One JSON line per request with its stage timings (see request_timing.py)
+timing_logger = timing_logger_from_env()
 
 app = Flask(__name__)
-CORS(app)
+# Let browser clients read the render metadata headers
+CORS(app, expose_headers=['X-Cache', 'X-Braille-Cols', 'X-Braille-Rows'])
+
+# Send art as UTF-8 (3 bytes per Braille cell) instead of \uXXXX escapes (6 bytes)
+app.json.ensure_ascii = False
+
+# Reject request bodies above this size with 413 before reading them
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('BRAILLEPIXEL_MAX_UPLOAD_MB', 16)) * 1024 * 1024
+
+# Shared cache of rendered results (see render_cache.py for the env settings)
+render_cache = RenderCache.from_env()
+
+# Decoded uploads referenced by image_id (see image_store.py for the env settings)
+image_store = ImageStore.from_env()
+
+# Resolve the text-to-emoji font once at startup instead of on the first request
+get_font()
+
+# Parameter types used when values arrive as form fields or query-string strings
+PARAM_TYPES = {
+    'cols': int, 'rows': int, 'width': int, 'threshold': int, 'spacing': int,
+    'block_size': int, 'offset': int,
+    'invert': bool, 'enhance': bool, 'binary_mode': bool, 'border': bool, 'gradient': bool,
+}
+
+class Upload:
+    """An uploaded image file: hashed once, opened with PIL on demand"""
+
+    def __init__(self, source):
+        self.source = source  # bytes, or a seekable binary file
+        self.digest = hash_image(source)
+
+    def open(self):
+        if isinstance(self.source, bytes):
+            return Image.open(io.BytesIO(self.source))
+        self.source.seek(0)
+        return Image.open(self.source)
+
+    def read(self):
+        """The raw image file bytes (e.g. to hand to a worker process)"""
+        if isinstance(self.source, bytes):
+            return self.source
+        self.source.seek(0)
+        return self.source.read()
+
+def parse_params(values):
+    """Convert form / query-string values to the types the JSON API uses"""
+    params = {}
+    for name, value in values.items():
+        kind = PARAM_TYPES.get(name)
+        if kind is bool:
+            value = value.strip().lower() in ('1', 'true', 'yes', 'on')
+        elif kind is not None and value != '':
+            value = kind(value)
+        params[name] = value
+    return params
+
+@app.errorhandler(HTTPException)
+def http_error_response(error):
+    """API errors raised while reading the request (413 for a body above
+    MAX_CONTENT_LENGTH, 400 for malformed JSON, ...) as JSON, like the others.
+
+    The views re-raise HTTPException past their catch-all handlers so that
+    these keep their status instead of turning into a 500.
+    """
+    if not request.path.startswith('/api/'):
+        return error
+    return jsonify({'error': error.description}), error.code
+
+@app.before_request
+def start_request_timer():
+    g.timer = RequestTimer()
+
+def stage(name):
+    """Context manager timing one stage (decode, resize, render, ...) of the current request"""
+    return g.timer.stage(name)
+
+def fit_cells(img, cols, rows):
+    """fit_to_cells() with the decode and the resize timed as separate stages"""
+    return fit_grids(img, [(cols, rows, None)])[(cols, rows, None)]
+
+def fit_grids(img, grids):
+    """fit_to_grids() with the decode and the resizes timed as separate stages"""
+    with stage('decode'):
+        img, sizes = decode_for_grids(img, grids)
+    with stage('resize'):
+        return resize_to_grids(img, sizes)
+
+def fit_upload_grids(upload, grids):
+    """fit_grids() for an upload, giving every grid exactly what fit_cells() would.
+
+    A JPEG is decoded at the draft scale of the largest grid, from which a
+    much smaller grid resizes slightly differently than from its own coarser
+    draft. So the grids are grouped by the scale they would be decoded at on
+    their own (found from the header) and each group is decoded once.
+    """
+    groups = {}
+    for grid in grids:
+        probe = upload.open()
+        draft_for_grids(probe, [grid])
+        groups.setdefault(probe.size, []).append(grid)
+    fitted = {}
+    for group in groups.values():
+        fitted.update(fit_grids(upload.open(), group))
+    return fitted
+
+def read_request():
+    """Return (params, upload) for an API request.
+
+    Three request formats are accepted:
+      - application/json with the image as a base64 data URL in 'image'
+      - multipart/form-data with an 'image' file part and form fields
+      - a raw image/* body with parameters in the query string
+    The upload is None when the request carries no image.
+    """
+    if request.mimetype == 'multipart/form-data':
+        image_file = request.files.get('image')
+        return parse_params(request.form), Upload(image_file.stream) if image_file else None
+    if request.mimetype.startswith('image/'):
+        return parse_params(request.args), Upload(request.get_data(cache=False))
+    data = request.get_json()
+    if 'image' not in data:
+        return data, None
+    return data, Upload(base64.b64decode(data['image'].split(',')[1]))
+
+# Upper bound on images x variants rendered by one /api/batch request
+MAX_BATCH_RENDERS = int(os.environ.get('BRAILLEPIXEL_MAX_BATCH', 64))
+
+def read_batch_request():
+    """Return (params, uploads, variants) for an /api/batch request.
+
+    JSON bodies carry one 'image' or a list of 'images' (data URLs) and a
+    'variants' list of parameter dicts. Multipart bodies carry one or more
+    'image' file parts and 'variants' as a JSON string field. Top-level
+    parameters are defaults for every variant; no variants means one render
+    with the top-level parameters.
+    """
+    if request.mimetype == 'multipart/form-data':
+        data = parse_params(request.form)
+        variants = json.loads(data.get('variants') or '[]')
+        uploads = [Upload(image_file.stream) for image_file in request.files.getlist('image')]
+    else:
+        data = request.get_json()
+        variants = data.get('variants') or []
+        images = data.get('images') or ([data['image']] if 'image' in data else [])
+        uploads = [Upload(base64.b64decode(image.split(',')[1])) for image in images]
+    defaults = {name: value for name, value in data.items() if name not in ('image', 'images', 'variants')}
+    return defaults, uploads, [{**defaults, **variant} for variant in variants] or [defaults]
+
+def render_batch(kind, upload, variants):
+    """Render every variant of one upload, decoding the image as few times as possible.
+
+    Variants already in the render cache are served from it; the rest share
+    one resized image per distinct output size, and one decode per JPEG draft
+    scale (see fit_upload_grids), so each result equals the single render
+    that /api/braille caches under the same key.
+    """
+    if kind == 'emoji':
+        jobs = [emoji_image_params(variant) for variant in variants]
+        keys = [make_key('emoji', upload.digest, width=width, **params) for width, params in jobs]
+    else:
+        jobs = [braille_params(variant) for variant in variants]
+        keys = [make_key('braille', upload.digest, **params) for params in jobs]
+    
+    results = [render_cache.get(key) for key in keys]
+    statuses = ['HIT' if result is not None else 'MISS' for result in results]
+    missing = [index for index, result in enumerate(results) if result is None]
+    
+    if missing and kind == 'emoji':
+        with stage('decode'):
+            img = upload.open()
+            img.load()
+        resized = {}
+        for index in missing:
+            width, params = jobs[index]
+            if width not in resized:
+                with stage('resize'):
+                    resized[width] = resize_image(img, width)
+            with stage('render'):
+                results[index] = image_to_emoji_mosaic(resized[width], **params)
+            render_cache.put(keys[index], results[index])
+    elif missing:
+        grids = {index: (jobs[index]['cols'], jobs[index]['rows'], None) for index in missing}
+        fitted = fit_upload_grids(upload, set(grids.values()))
+        grayscale = {}
+        for index in missing:
+            params = jobs[index]
+            img = fitted[grids[index]]
+            if id(img) not in grayscale:
+                grayscale[id(img)] = img.convert('L')
+            with stage('render'):
+                results[index] = image_to_braille(grayscale[id(img)], **render_options(params))
+            render_cache.put(keys[index], results[index])
+    
+    return [{'variant': index, 'result': result, 'cache': status}
+            for index, (result, status) in enumerate(zip(results, statuses))]
+
+# Most thresholds one /api/braille/sweep request may render (every one from 0 to 256)
+MAX_SWEEP_THRESHOLDS = 257
+
+def sweep_thresholds(value):
+    """Threshold list for /api/braille/sweep.
+
+    Accepts a list of integers, a {"start", "stop", "step"} object with range()
+    semantics, or (from form fields and query strings) a comma-separated string.
+    Thresholds run from 0 (no dots) to 256 (every dot).
+    """
+    if isinstance(value, dict):
+        thresholds = range(int(value.get('start', 0)), int(value['stop']), int(value.get('step', 1)))
+        # A range's length is known without building it, so a huge one is
+        # refused before it costs anything
+        if len(thresholds) > MAX_SWEEP_THRESHOLDS:
+            raise ValueError(f'Too many thresholds (limit {MAX_SWEEP_THRESHOLDS})')
+    elif isinstance(value, str):
+        thresholds = [int(t) for t in value.split(',') if t.strip()]
+    else:
+        thresholds = [int(t) for t in value]
+    thresholds = list(dict.fromkeys(thresholds))
+    if not thresholds:
+        raise ValueError('No thresholds given')
+    if len(thresholds) > MAX_SWEEP_THRESHOLDS:
+        raise ValueError(f'Too many thresholds (limit {MAX_SWEEP_THRESHOLDS})')
+    if not all(0 <= t <= 256 for t in thresholds):
+        raise ValueError('Thresholds must be between 0 and 256')
+    return thresholds
+
+def braille_params(data):
+    """Braille render parameters from request data, with API defaults"""
+    return {
+        'cols': data.get('cols', 80),
+        'rows': data.get('rows', None),
+        'threshold': data.get('threshold', 127),
+        'invert': bool(data.get('invert', False)),
+        'dither': data.get('dither', 'none'),
+        'threshold_mode': data.get('threshold_mode', 'global'),
+        'block_size': data.get('block_size', DEFAULT_BLOCK_SIZE),
+        'offset': data.get('offset', DEFAULT_OFFSET),
+        'enhance': bool(data.get('enhance', False)),
+    }
+
+# braille_params entries that are image_to_braille() arguments (the rest pick the size)
+RENDER_OPTIONS = ('threshold', 'invert', 'dither', 'threshold_mode', 'block_size', 'offset', 'enhance')
+
+def render_options(params):
+    """image_to_braille() keyword arguments for braille_params"""
+    return {name: params[name] for name in RENDER_OPTIONS}
+
+def emoji_image_params(data):
+    """(width, mosaic parameters) for an image-mode emoji request"""
+    width = data.get('width', 80)
+    binary_mode = data.get('binary_mode', False)
+    on_emoji = data.get('on_emoji', '🔥')
+    off_emoji = data.get('off_emoji', '⚪')
+    threshold = data.get('threshold', 128)
+    emoji_set = data.get('emoji_set', 'geometric')
+    custom_emojis = data.get('custom_emojis', '')
+    
+    if binary_mode:
+        # Binary mode with on/off emojis
+        return width, dict(binary_mode=True, on_emoji=on_emoji, off_emoji=off_emoji, threshold=threshold)
+    
+    # Gradient mode with emoji sets
+    if custom_emojis:
+        emoji_list = [e.strip() for e in custom_emojis.split(',') if e.strip()]
+    elif emoji_set in EMOJI_SETS:
+        emoji_list = EMOJI_SETS[emoji_set]
+    else:
+        emoji_list = EMOJI_SETS['geometric']
+    return width, dict(binary_mode=False, emoji_list=emoji_list)
+
+# Values of the 'stream' parameter, mapped to the streamed response format
+STREAM_FORMATS = {'text': 'text', 'true': 'text', '1': 'text', 'ndjson': 'ndjson'}
+
+def stream_format(data):
+    """'text', 'ndjson' or None (a normal JSON response) for the 'stream' parameter"""
+    value = data.get('stream')
+    if value is None or value is False:
+        return None
+    value = str(value).strip().lower()
+    if value in ('', 'false', '0', 'no', 'off'):
+        return None
+    if value not in STREAM_FORMATS:
+        raise ValueError(f"Unknown stream format {value!r}, expected 'text' or 'ndjson'")
+    return STREAM_FORMATS[value]
+
+# Values of the 'format' parameter of /api/braille: the JSON document, or the
+# raw cell codes (one byte per cell, row-major; the glyph is U+2800 + code)
+WIRE_FORMATS = ('json', 'codes')
+
+def braille_wire_format(data):
+    """The 'format' parameter of a Braille render, validated"""
+    wire_format = str(data.get('format', 'json')).strip().lower()
+    if wire_format not in WIRE_FORMATS:
+        raise ValueError(f"Unknown format {wire_format!r}, expected 'json' or 'codes'")
+    return wire_format
+
+def braille_output(data):
+    """(stream format or None, wire format) requested for a Braille render"""
+    fmt = stream_format(data)
+    wire_format = braille_wire_format(data)
+    if fmt and wire_format != 'json':
+        raise ValueError("format='codes' cannot be streamed")
+    if fmt and data.get('dither', 'none') != 'none':
+        raise ValueError('Dithered renders cannot be streamed')
+    if fmt and data.get('threshold_mode') in ADAPTIVE_MODES:
+        raise ValueError(f"threshold_mode={data['threshold_mode']!r} cannot be streamed")
+    return fmt, wire_format
+
+def streamed_braille_response(img, params, fmt):
+    """Stream Braille art line by line as it is rendered.
+
+    Lines come from textart.iter_braille_rows, which resizes and thresholds one
+    cell row at a time, so the first bytes go out right away and the server
+    never holds the whole bitmap or art string. 'text' sends the same text as
+    the JSON 'result' would hold (up to resampling rounding at strip edges);
+    'ndjson' sends one {"row": n, "line": "..."} object per line. Streamed
+    renders bypass the render cache.
+
+    The first line is rendered before the response is returned, so errors in
+    decoding or setup (which iter_braille_rows only raises once iterated)
+    still become a JSON error instead of a truncated 200 response.
+    """
+    rows = iter_braille_rows(img, cols=params['cols'], rows=params['rows'], threshold=params['threshold'],
+                             invert=params['invert'], threshold_mode=params['threshold_mode'],
+                             enhance=params['enhance'])
+    try:
+        with stage('render'):
+            first = next(rows, None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    rows = itertools.chain([] if first is None else [first], rows)
+    if fmt == 'ndjson':
+        chunks = (json.dumps({'row': n, 'line': line}, ensure_ascii=False) + '\n'
+                  for n, line in enumerate(rows))
+        mimetype = 'application/x-ndjson'
+    else:
+        chunks = ((line if n == 0 else '\n' + line) for n, line in enumerate(rows))
+        mimetype = 'text/plain'
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['X-Accel-Buffering'] = 'no'  # don't let a reverse proxy buffer the stream
+    return response
+
+def result_response(result, cache_status, wire_format='json'):
+    """Response for rendered art: JSON, or raw Braille cell codes for format='codes'"""
+    with stage('serialize'):
+        if wire_format == 'codes':
+            codes, cols, rows = braille_to_codes(result)
+            response = Response(codes, mimetype='application/octet-stream')
+            response.headers['X-Braille-Cols'] = str(cols)
+            response.headers['X-Braille-Rows'] = str(rows)
+        else:
+            response = jsonify({'result': result})
+    response.headers['X-Cache'] = cache_status
+    return response
+
+def cached_result(key, render, wire_format='json'):
+    """Return a response for ``key``, calling ``render()`` only on a cache miss.
+
+    The response carries an X-Cache header set to HIT or MISS.
+    """
+    result = render_cache.get(key)
+    if result is not None:
+        return result_response(result, 'HIT', wire_format)
+    # Stages timed inside render() (decode, resize) are not counted as render
+    with stage('render'):
+        result = render()
+    render_cache.put(key, result)
+    return result_response(result, 'MISS', wire_format)
+
+class UnknownImage(LookupError):
+    """An image_id that is not (or no longer) in the image store"""
+
+def stored_image(image_id, key, resize):
+    """The resized copy ``key`` of a stored image (see ImageStore.resized)"""
+    img = image_store.resized(image_id, key, resize)
+    if img is None:
+        raise UnknownImage(image_id)
+    return img
+
+def unknown_image_response(error):
+    return jsonify({'error': f'Unknown or expired image_id: {error}'}), 404
+
+def stored_braille_response(data):
+    """Braille render of an image from the image store; only thresholding runs per request"""
+    params = braille_params(data)
+    image_id = data['image_id']
+    try:
+        fmt, wire_format = braille_output(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if fmt:
+        img = image_store.get(image_id)
+        if img is None:
+            return unknown_image_response(image_id)
+        return streamed_braille_response(img, params, fmt)
+    
+    def render():
+        img = stored_image(image_id, ('braille', params['cols'], params['rows']),
+                           lambda img: fit_cells(img, params['cols'], params['rows']))
+        return image_to_braille(img, **render_options(params))
+    
+    try:
+        return cached_result(make_key('braille-stored', image_id, **params), render, wire_format)
+    except UnknownImage as e:
+        return unknown_image_response(e)
+
+def stored_emoji_response(data):
+    """Emoji mosaic of an image from the image store"""
+    width, params = emoji_image_params(data)
+    image_id = data['image_id']
+    
+    def render():
+        with stage('resize'):
+            img = stored_image(image_id, ('emoji', width), lambda img: resize_image(img, width))
+        return image_to_emoji_mosaic(img, **params)
+    
+    try:
+        return cached_result(make_key('emoji-stored', image_id, width=width, **params), render)
+    except UnknownImage as e:
+        return unknown_image_response(e)
+
+# Worker processes for the async API. Under Gunicorn this is a client of the
+# one pool the master starts for the whole host (see gunicorn.conf.py);
+# otherwise a pool of this process, created on first use.
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def get_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = host_pool() or RenderPool.from_env()
+        return _render_pool
+
+async def pooled_result(key, job, *args, wire_format='json', **kwargs):
+    """Async cached_result: on a miss, ``job(*args, **kwargs)`` runs in the render pool.
+
+    Raises PoolSaturated when the pool's queue-depth limit is reached.
+    """
+    result = render_cache.get(key)
+    if result is not None:
+        return result_response(result, 'HIT', wire_format)
+    # The worker decodes, resizes and renders; 'pool' covers queueing and all of that
+    with stage('pool'):
+        future = get_render_pool().submit(job, *args, **kwargs)
+        result = await asyncio.wrap_future(future)
+    render_cache.put(key, result)
+    return result_response(result, 'MISS', wire_format)
+
+def saturated_response(error):
+    response = jsonify({'error': f'Server busy: {error}'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+# Gzip/Brotli-encode compressible responses of at least this many bytes
+# (BRAILLEPIXEL_COMPRESS=0 disables it, e.g. behind a compressing proxy)
+COMPRESS_RESPONSES = os.environ.get('BRAILLEPIXEL_COMPRESS', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+COMPRESS_MIN_BYTES = int(os.environ.get('BRAILLEPIXEL_COMPRESS_MIN_BYTES', 512))
+
+# Registered before compress_response so that it runs after it (Flask calls
+# after_request functions in reverse order) and the record includes compression
+@app.after_request
+def log_request_timing(response):
+    """Log the request's stage timings as one JSON line to the braillepixel.timing logger.
+
+    For streamed responses the record is written before the body is sent, so
+    it covers the work done up to the first byte.
+    """
+    if timing_logger.isEnabledFor(logging.INFO) and 'timer' in g:
+        record = g.timer.record(method=request.method, path=request.path, status=response.status_code,
+                                cache=response.headers.get('X-Cache'),
+                                bytes=None if response.is_streamed else response.content_length)
+        timing_logger.info(json.dumps(record))
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Compress the response with the best encoding the client accepts"""
+    if (not COMPRESS_RESPONSES or response.direct_passthrough
+            or response.mimetype not in COMPRESSIBLE_TYPES or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+    
+    if response.is_streamed:
+        response.response = compress_stream(response.iter_encoded(), encoding)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return response
+        with stage('compress'):
+            response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
 
 # Fallback routes for Netlify function paths (for local development)
 @app.route('/.netlify/functions/braille', methods=['POST', 'OPTIONS'])
@@ -62,38 +579,95 @@ def static_files(path):
 def generate_braille_api():
     """Generate Braille art from uploaded image"""
     try:
-        data = request.get_json()
+        data, upload = read_request()
         
-        if 'image' not in data:
+        if upload is None and 'image_id' in data:
+            return stored_braille_response(data)
+        if upload is None:
             return jsonify({'error': 'No image data provided'}), 400
         
-        # Decode base64 image
-        image_data = base64.b64decode(data['image'].split(',')[1])
-        img = Image.open(io.BytesIO(image_data))
-        
         # Get parameters
-        cols = data.get('cols', 80)
-        rows = data.get('rows', None)
-        threshold = data.get('threshold', 127)
-        invert = data.get('invert', False)
+        params = braille_params(data)
+        
+        logger.debug("Web API: cols=%(cols)s, threshold=%(threshold)s, invert=%(invert)s", params)
+        
+        try:
+            fmt, wire_format = braille_output(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if fmt:
+            # Opened here so an unreadable image is still a JSON error response. The
+            # file bytes are copied out because uploaded files are closed once the
+            # view returns, before the stream has been sent.
+            img = Image.open(io.BytesIO(upload.read()))
+            return streamed_braille_response(img, params, fmt)
+        
+        def render():
+            img = fit_cells(upload.open(), params['cols'], params['rows'])
+            return image_to_braille(img, **render_options(params))
+        
+        key = make_key('braille', upload.digest, **params)
+        return cached_result(key, render, wire_format)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error in braille API")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/braille/sweep', methods=['POST'])
+def generate_braille_sweep_api():
+    """Render Braille art at many thresholds from one decode and one resize"""
+    try:
+        data, upload = read_request()
+        
+        if upload is None and 'image_id' not in data:
+            return jsonify({'error': 'No image data provided'}), 400
+        if 'thresholds' not in data:
+            return jsonify({'error': 'No thresholds provided'}), 400
+        try:
+            thresholds = sweep_thresholds(data['thresholds'])
+        except (TypeError, ValueError, KeyError) as e:
+            return jsonify({'error': f'Invalid thresholds: {e}'}), 400
         
-        print(f"Debug - Web API: cols={cols}, threshold={threshold}, invert={invert}", file=sys.stderr)
+        params = braille_params(data)
+        if params['threshold_mode'] != 'global':
+            return jsonify({'error': 'Only the global threshold mode can be swept'}), 400
+        cols, rows, invert = params['cols'], params['rows'], params['invert']
+        if upload is None:
+            kind, image_id = 'braille-stored', data['image_id']
+            try:
+                img = stored_image(image_id, ('braille', cols, rows),
+                                   lambda img: fit_cells(img, cols, rows))
+            except UnknownImage as e:
+                return unknown_image_response(e)
+        else:
+            kind, image_id = 'braille', upload.digest
+            img = fit_cells(upload.open(), cols, rows)
         
-        # Process image
-        img = resize_to_cells(img, cols=cols, rows=rows)
-        result = image_to_braille(img, threshold=threshold, invert=invert)
+        with stage('render'):
+            results = braille_threshold_sweep(img, thresholds, invert=invert, dither=params['dither'],
+                                              enhance=params['enhance'])
+        # Each render equals the single-threshold one, so picking a threshold
+        # from the preview is then a cache hit
+        for threshold, result in results.items():
+            render_cache.put(make_key(kind, image_id, **{**params, 'threshold': threshold}), result)
         
-        return jsonify({'result': result})
+        with stage('serialize'):
+            return jsonify({'results': [{'threshold': threshold, 'result': result}
+                                        for threshold, result in results.items()]})
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in braille API: {e}", file=sys.stderr)
+        logger.exception("Error in braille sweep API")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/emoji', methods=['POST'])
 def generate_emoji_api():
     """Generate emoji art from image or text"""
     try:
-        data = request.get_json()
+        data, upload = read_request()
         mode = data.get('mode', 'image')
         
         if mode == 'text':
@@ -106,51 +680,162 @@ def generate_emoji_api():
             if not text:
                 return jsonify({'error': 'No text provided'}), 400
             
-            result = text_to_emoji_art(text, on_emoji=on_emoji, off_emoji=off_emoji, width=width, binary_threshold=threshold)
+            key = make_key('emoji-text', text=text, on_emoji=on_emoji, off_emoji=off_emoji,
+                           width=width, threshold=threshold)
+            return cached_result(key, lambda: text_to_emoji_art(
+                text, on_emoji=on_emoji, off_emoji=off_emoji, width=width, binary_threshold=threshold))
             
         else:  # image mode
-            if 'image' not in data:
+            if upload is None and 'image_id' in data:
+                return stored_emoji_response(data)
+            if upload is None:
                 return jsonify({'error': 'No image data provided'}), 400
             
-            # Decode base64 image
-            image_data = base64.b64decode(data['image'].split(',')[1])
-            img = Image.open(io.BytesIO(image_data))
-            
             # Get parameters
-            width = data.get('width', 80)
-            binary_mode = data.get('binary_mode', False)
-            on_emoji = data.get('on_emoji', '🔥')
-            off_emoji = data.get('off_emoji', '⚪')
-            threshold = data.get('threshold', 128)
-            emoji_set = data.get('emoji_set', 'geometric')
-            custom_emojis = data.get('custom_emojis', '')
+            width, params = emoji_image_params(data)
             
-            # Process image
-            img = resize_image(img, width)
+            def render():
+                with stage('decode'):
+                    img = upload.open()
+                    img.load()
+                with stage('resize'):
+                    img = resize_image(img, width)
+                return image_to_emoji_mosaic(img, **params)
             
-            if binary_mode:
-                # Binary mode with on/off emojis
-                result = image_to_emoji_mosaic(
-                    img, 
-                    binary_mode=True,
-                    on_emoji=on_emoji,
-                    off_emoji=off_emoji,
-                    threshold=threshold
-                )
-            else:
-                # Gradient mode with emoji sets
-                if custom_emojis:
-                    emoji_list = [e.strip() for e in custom_emojis.split(',') if e.strip()]
-                elif emoji_set in EMOJI_SETS:
-                    emoji_list = EMOJI_SETS[emoji_set]
-                else:
-                    emoji_list = EMOJI_SETS['geometric']
-                
-                result = image_to_emoji_mosaic(img, emoji_list=emoji_list, binary_mode=False)
-        
-        return jsonify({'result': result})
+            key = make_key('emoji', upload.digest, width=width, **params)
+            return cached_result(key, render)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/async/braille', methods=['POST'])
+async def generate_braille_async_api():
+    """Generate Braille art, decoding and rendering in the render pool"""
+    try:
+        data, upload = read_request()
+        
+        # Stored images are already decoded and resized; render them inline
+        if upload is None and 'image_id' in data:
+            return stored_braille_response(data)
+        if upload is None:
+            return jsonify({'error': 'No image data provided'}), 400
+        
+        params = braille_params(data)
+        try:
+            fmt, wire_format = braille_output(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if fmt:
+            # Streamed renders go out line by line as they are rendered, so they
+            # run in this request rather than as one job in the render pool
+            img = Image.open(io.BytesIO(upload.read()))
+            return streamed_braille_response(img, params, fmt)
+        key = make_key('braille', upload.digest, **params)
+        return await pooled_result(key, render_braille_job, upload.read(), wire_format=wire_format, **params)
         
+    except PoolSaturated as e:
+        return saturated_response(e)
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Error in async braille API")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/async/emoji', methods=['POST'])
+async def generate_emoji_async_api():
+    """Generate an emoji mosaic from an image, decoding and rendering in the render pool"""
+    try:
+        data, upload = read_request()
+        
+        if upload is None and 'image_id' in data:
+            return stored_emoji_response(data)
+        if upload is None:
+            return jsonify({'error': 'No image data provided'}), 400
+        
+        width, params = emoji_image_params(data)
+        key = make_key('emoji', upload.digest, width=width, **params)
+        return await pooled_result(key, render_emoji_job, upload.read(), width=width, **params)
+        
+    except PoolSaturated as e:
+        return saturated_response(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/images', methods=['POST'])
+def upload_image_api():
+    """Decode an image once and keep it for later renders that pass its image_id"""
+    try:
+        _data, upload = read_request()
+        
+        if upload is None:
+            return jsonify({'error': 'No image data provided'}), 400
+        
+        with stage('decode'):
+            img = image_store.add(upload.digest, upload.open())
+        return jsonify({
+            'image_id': upload.digest,
+            'width': img.width,
+            'height': img.height,
+            'expires_in': image_store.ttl,
+        }), 201
+        
+    except ImageTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except ImageNotShared as e:
+        # Out of room for the workers' shared copy; an id only this worker
+        # knows would be a 404 on the others
+        logger.warning("Image upload not stored: %s", e)
+        return jsonify({'error': str(e)}), 507
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error in image upload API")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/images/<image_id>', methods=['DELETE'])
+def delete_image_api(image_id):
+    """Drop a stored image before its TTL runs out"""
+    if not image_store.discard(image_id):
+        return unknown_image_response(image_id)
+    return '', 204
+
+@app.route('/api/batch', methods=['POST'])
+def generate_batch_api():
+    """Render one or more images with a list of parameter sets in a single request"""
+    try:
+        data, uploads, variants = read_batch_request()
+        
+        if not uploads:
+            return jsonify({'error': 'No image data provided'}), 400
+        if len(uploads) * len(variants) > MAX_BATCH_RENDERS:
+            return jsonify({'error': f'Too many renders in one batch (limit {MAX_BATCH_RENDERS})'}), 400
+        
+        kind = data.get('type', 'braille')
+        if kind not in ('braille', 'emoji'):
+            return jsonify({'error': f'Unknown batch type: {kind}'}), 400
+        
+        results = []
+        for image_index, upload in enumerate(uploads):
+            try:
+                items = render_batch(kind, upload, variants)
+            except Exception as e:
+                # One unreadable image does not fail the other images
+                items = [{'variant': index, 'error': str(e)} for index in range(len(variants))]
+            for item in items:
+                item['image'] = image_index
+            results.extend(items)
+        
+        with stage('serialize'):
+            return jsonify({'results': results})
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error in batch API")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/ascii', methods=['POST'])
@@ -168,18 +853,23 @@ def generate_ascii_api():
         border = data.get('border', False)
         gradient = data.get('gradient', False)
         
-        # Generate ASCII art
-        result = text_to_ascii_art(text, font, spacing)
-        
-        # Apply effects
-        if gradient:
-            result = create_gradient_text(result)
-        
-        if border:
-            result = create_border(result, '#')
+        def render():
+            # Generate ASCII art
+            result = text_to_ascii_art(text, font, spacing)
+            
+            # Apply effects
+            if gradient:
+                result = create_gradient_text(result)
+            
+            if border:
+                result = create_border(result, '#')
+            return result
         
-        return jsonify({'result': result})
+        key = make_key('ascii', text=text, font=font, spacing=spacing, border=bool(border), gradient=bool(gradient))
+        return cached_result(key, render)
         
+    except HTTPException:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -190,7 +880,46 @@ def get_emoji_sets():
         'sets': {name: emojis[:10] for name, emojis in EMOJI_SETS.items()}
     })
 
+def serve_production(bind=None, workers=None):
+    """Run the app under Gunicorn with the settings from gunicorn.conf.py"""
+    import runpy
+    from gunicorn.app.base import BaseApplication
+
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+
+    class ProductionServer(BaseApplication):
+        def load_config(self):
+            for name, value in runpy.run_path(config_path).items():
+                if name in self.cfg.settings and value is not None:
+                    self.cfg.set(name, value)
+            if bind:
+                self.cfg.set('bind', bind)
+            if workers:
+                self.cfg.set('workers', workers)
+
+        def load(self):
+            # This module was imported before gunicorn.conf.py set up the
+            # run's shared image directory
+            global image_store
+            image_store = ImageStore.from_env()
+            return app
+
+    ProductionServer().run()
+
+def parse_args():
+    import argparse
+    parser = argparse.ArgumentParser(description="BraillePixel web server")
+    parser.add_argument('--production', action='store_true',
+                        help='Serve with Gunicorn (pre-forked workers, see gunicorn.conf.py)')
+    parser.add_argument('--bind', help='Address to listen on (production mode), e.g. 0.0.0.0:8000')
+    parser.add_argument('--workers', type=int, help='Number of worker processes (production mode)')
+    return parser.parse_args()
+
 if __name__ == '__main__':
-    print("Starting BraillePixel Web Server...")
-    print("Open http://localhost:5000 in your browser")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    args = parse_args()
+    if args.production:
+        serve_production(bind=args.bind, workers=args.workers)
+    else:
+        print("Starting BraillePixel Web Server...")
+        print("Open http://localhost:5000 in your browser")
+        app.run(debug=True, host='0.0.0.0', port=5000)